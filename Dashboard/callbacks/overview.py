@@ -1,8 +1,7 @@
 from dash import Input, Output, callback
 import plotly.graph_objects as go
 
-from Dashboard.data_access.events import load_event_data_kpis
-from supportFolder.overview_data import build_overview_team_kpis
+from supportFolder.overview_data import load_overview_team_kpis
 
 
 @callback(
@@ -20,18 +19,7 @@ def update_team_kpis(match_id, team_side):
     if not match_id or not team_side:
         return ["–"] * 6
 
-    df_events = load_event_data_kpis(match_id)
-    if df_events.empty:
-        return ["–"] * 6
-
-    # 🔑 UI chỉ dùng để chọn teamID
-    team_id = (
-        df_events["homeTeamID"].iloc[0]
-        if team_side == "home"
-        else df_events["awayTeamID"].iloc[0]
-    )
-
-    kpis = build_overview_team_kpis(df_events, team_id)
+    kpis = load_overview_team_kpis(match_id, team_side)
     if not kpis:
         return ["–"] * 6
 
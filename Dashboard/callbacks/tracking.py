@@ -22,9 +22,10 @@ def update_phase_slider(match_id):
     if not phases:
         return 1, 1, {}, 1
 
-    marks = {p: str(p) for p in phases}
+    # Slider = thứ tự phase (1..n), tên file dùng phase key
+    marks = {i: str(i) for i in range(1, len(phases) + 1)}
 
-    return min(phases), max(phases), marks, phases[0]
+    return 1, len(phases), marks, 1
 
 
 
@@ -42,12 +43,17 @@ def update_video_src(match_id, phase, team):
     if not match_id or not phase or not team:
         return None, "empty"
 
+    phases = list_video_phases(match_id)
+    if phase > len(phases):
+        return None, "empty"
+
     team = team.capitalize()  # home → Home
+    phase_key = phases[phase - 1]
 
-    filename = f"match_{match_id}_phase_{phase}_{team}.mp4"
+    filename = f"match_{match_id}_phase_{phase_key}_{team}.mp4"
     src = f"/assets/video/{filename}"
 
-    key = f"{match_id}-{phase}-{team}"
+    key = f"{match_id}-{phase_key}-{team}"
 
     return src, key
 
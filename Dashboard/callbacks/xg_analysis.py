@@ -1,7 +1,7 @@
 from dash import Input, Output, callback
 import plotly.graph_objects as go
 
-from data_access.events import load_event_data, load_xg_data
+from Dashboard.data_access.events import load_event_data, load_xg_data, SHOT_HEATMAP_COLUMNS
 from supportFolder.heatmap_xG import build_goal_probability_heatmap, filter_outlier_shots_and_plot_heatmap
 from supportFolder.metrics_eval import build_xg_calibration_figure
 
@@ -16,7 +16,7 @@ from supportFolder.metrics_eval import build_xg_calibration_figure
 )
 def update_goal_probability_heatmap(_):
 
-    df_shots = load_event_data(shots_only=True)
+    df_shots = load_event_data(shots_only=True, columns=SHOT_HEATMAP_COLUMNS)
 
     if df_shots.empty:
         return go.Figure()
@@ -33,7 +33,11 @@ def update_goal_probability_heatmap(_):
 )
 def update_scoring_probability_heatmap(_):
 
-    df_events = load_event_data(shots_only=False)
+    df_events = load_event_data(
+        shots_only=False,
+        columns=SHOT_HEATMAP_COLUMNS,
+        filters=[("eventName", "in", ["Shot", "Pass"])]
+    )
 
     if df_events.empty:
         return go.Figure()
@@ -0,0 +1,145 @@
+# Dashboard/data_access/cache.py
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+
+from preprocessing.event_store import SCHEMA_FILE
+
+
+# ===============================
+# CACHE CONFIG
+# ===============================
+DEFAULT_MAX_BYTES = int(os.getenv("DASHBOARD_CACHE_MAX_BYTES", 1024 ** 3))
+
+
+def _freeze(value):
+    """
+    Convert list / dict arguments (columns, filters) into a hashable key
+    """
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        items = [_freeze(v) for v in value]
+        return tuple(sorted(items, key=repr)) if isinstance(value, set) else tuple(items)
+    return value
+
+
+def source_mtime(path: Path) -> int:
+    """
+    Modification time (ns) of a parquet file, or of the _common_metadata of a dataset directory
+    (rewritten by every write of the event store / KPI cube -> 1 stat instead of walking all partitions)
+    """
+    path = Path(path)
+    if not path.exists():
+        return -1
+
+    if path.is_dir():
+        marker = path / SCHEMA_FILE
+        return marker.stat().st_mtime_ns if marker.exists() else path.stat().st_mtime_ns
+
+    return path.stat().st_mtime_ns
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+# ===============================
+# MAIN CLASS
+# ===============================
+class FrameCache:
+    """
+    Process-wide LRU cache of DataFrames read from parquet, bounded by memory (bytes).
+
+    Key: (file path, mtime, column projection, filter, reader) -> a rewritten file is a new key,
+    so stale entries are never served and simply age out of the LRU.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def make_key(self, path, columns=None, filters=None, variant=None):
+        path = Path(path)
+        return (str(path.resolve()), source_mtime(path), _freeze(columns), _freeze(filters), variant)
+
+    def get_or_load(self, path, loader, columns=None, filters=None, variant=None) -> pd.DataFrame:
+        """
+        Return cached frame for (path, columns, filters, variant) or call loader() on a miss.
+        variant: what loader does with the path (e.g. the reader function), when it is not always the same
+
+        The caller receives a shallow copy: adding / dropping columns never touches the cached frame.
+        """
+        key = self.make_key(path, columns, filters, variant)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0].copy(deep=False)
+            self.misses += 1
+
+        df = loader()
+        nbytes = frame_nbytes(df)
+
+        with self._lock:
+            if nbytes <= self.max_bytes and key not in self._entries:
+                self._entries[key] = (df, nbytes)
+                self.current_bytes += nbytes
+                self._evict()
+
+        return df.copy(deep=False)
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self.current_bytes -= nbytes
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+# Shared by every callback (import through Dashboard.data_access.cache so there is one instance)
+EVENT_CACHE = FrameCache()
+
+
+def read_parquet_cached(path, columns=None, filters=None, reader=pd.read_parquet, cache: FrameCache = EVENT_CACHE) -> pd.DataFrame:
+    """
+    reader(path, columns=..., filters=...) through the shared cache
+    (pd.read_parquet for a single file, read_event_store for the partitioned store)
+    """
+    return cache.get_or_load(
+        path,
+        lambda: reader(path, columns=columns, filters=filters),
+        columns=columns,
+        filters=filters,
+        variant=f"{reader.__module__}.{reader.__qualname__}",
+    )
@@ -2,31 +2,44 @@
 from pathlib import Path
 import pandas as pd
 
+from Dashboard.data_access.cache import read_parquet_cached
+from preprocessing.event_store import read_event_store, read_match_events
+from preprocessing.kpi_cube import read_cube_partitions
+
 DASHBOARD_ROOT = Path(__file__).resolve().parents[1]
 PROJECT_ROOT = DASHBOARD_ROOT.parent
 
 DATASET_DIR = PROJECT_ROOT / "dataset"
 DATA_TRANSFORM_DIR = DATASET_DIR / "data_transforms"
 DATA_MODEL_DIR = DATASET_DIR / "dataModel"
+EVENT_STORE_DIR = DATA_TRANSFORM_DIR / "event_store"
+KPI_CUBE_DIR = DATA_TRANSFORM_DIR / "kpi_cube"
 
 ASSETS_DIR = DASHBOARD_ROOT / "assets"
 VIDEO_DIR = ASSETS_DIR / "video"
 
 
+SHOT_HEATMAP_COLUMNS = ["eventName", "posBeforeXMeters", "posBeforeYMeters", "Goal"]
+
+
 def load_event_data(
     shots_only=True,
-    file_name="event_data_transform.parquet"
+    columns=None,
+    filters=None,
+    store_dir=EVENT_STORE_DIR
 ):
     """
-    Load transformed event data (events / shots)
-    """
-    path = DATA_TRANSFORM_DIR / file_name
-    df_events = pd.read_parquet(path)
+    Load transformed event data (events / shots) from the partitioned event store
 
+    columns: only read these columns (column projection)
+    filters: pyarrow row filters, e.g. [("eventName", "in", ["Shot", "Pass"])]
+             pushed down to the parquet reader -> partitions / row groups are skipped
+    """
+    filters = list(filters) if filters else []
     if shots_only:
-        return df_events[df_events["eventName"] == "Shot"].copy()
+        filters.append(("eventName", "==", "Shot"))
 
-    return df_events
+    return read_parquet_cached(store_dir, columns=columns, filters=filters or None, reader=read_event_store)
 
 
 def load_event_data_kpis(matchID: int = 2500045) -> pd.DataFrame:
@@ -36,15 +49,19 @@ def load_event_data_kpis(matchID: int = 2500045) -> pd.DataFrame:
     - overview_data.py
     - xG tab
     - shots map
-    """
 
-    file_path = DATA_TRANSFORM_DIR / f"events_transformed_{matchID}.parquet"
+    Columns of the tracking pipeline (TRACKING_EVENT_COLUMNS) whichever pipeline wrote the match:
+    season coordinates (shot flip / goal-kick fix) + frames / Team of the tracking partition
+    """
+    df = read_parquet_cached(
+        EVENT_STORE_DIR,
+        filters=[("matchID", "==", matchID)],
+        reader=read_match_events
+    )
 
-    if not file_path.exists():
+    if df.empty:
         return pd.DataFrame()
 
-    df = pd.read_parquet(file_path)
-
     # safety check
     if df["matchID"].nunique() > 1:
         raise ValueError("Event file contains multiple matchID")
@@ -52,6 +69,20 @@ def load_event_data_kpis(matchID: int = 2500045) -> pd.DataFrame:
     return df
 
 
+def load_kpi_cube(grain="team_match", filters=None) -> pd.DataFrame:
+    """
+    Load the precomputed KPI cube (written by the ETL)
+    grain: 'team_match' | 'player_match'
+    Empty DataFrame when the cube has not been built yet
+    filters on matchID only open those partitions
+    """
+    path = KPI_CUBE_DIR / grain
+    if not path.exists():
+        return pd.DataFrame()
+
+    return read_parquet_cached(path, filters=filters, reader=read_cube_partitions)
+
+
 def load_xg_data(split="train"):
     """
     Load xG model data
@@ -64,26 +95,33 @@ def load_xg_data(split="train"):
     else:
         raise ValueError("split must be 'train' or 'test'")
 
-    return pd.read_parquet(path)
+    return read_parquet_cached(path)
+
+
+def video_phase_key(path: Path) -> str:
+    """
+    match_{id}_phase_{key}_{team}.mp4 -> key ("firstEventID-lastEventID", or a legacy index)
+    """
+    return path.stem.split("_phase_")[1].rsplit("_", 1)[0]
 
 
 def list_video_phases(match_id: int):
     """
-    Return available phase IDs for a match (from assets/video)
+    Return available phase keys for a match (from assets/video), in event order
     """
     if not VIDEO_DIR.exists():
         return []
 
-    phases = set()
+    phases = {}
 
     for p in VIDEO_DIR.glob(f"match_{match_id}_phase_*_*.mp4"):
         try:
-            phase = int(p.stem.split("_phase_")[1].split("_")[0])
-            phases.add(phase)
+            key = video_phase_key(p)
+            phases[key] = tuple(int(part) for part in key.split("-"))
         except (IndexError, ValueError):
             continue
 
-    return sorted(phases)
+    return sorted(phases, key=phases.get)
 
 
 def list_matches_with_video():
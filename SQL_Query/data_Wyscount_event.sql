@@ -1,6 +1,8 @@
 SELECT 
     E.eventRecordID,
     E.matchID,
+    M.competitionID,
+    M.matchDate,
     E.matchPeriod,
     E.eventSec,
     EN.eventName,
@@ -20,6 +22,8 @@ SELECT
         '[' + STRING_AGG(CAST(T.tagID AS VARCHAR(10)), ',') + ']'
     ) AS tagIDs
 FROM EVENTS AS E
+JOIN MATCHES AS M
+    ON E.matchID = M.matchID
 JOIN EVENTSNAME AS EN 
     ON E.subEventID = EN.subEventID
 JOIN PLAYERS AS P
@@ -36,6 +40,8 @@ LEFT JOIN (
 GROUP BY
     E.eventRecordID,
     E.matchID,
+    M.competitionID,
+    M.matchDate,
     E.matchPeriod,
     E.eventSec,
     EN.eventName,
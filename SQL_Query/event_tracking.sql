@@ -5,6 +5,7 @@ DECLARE @game INT;
 SELECT
     -- Match info
     m.matchID,
+    m.competitionID,
     m.labelMatch,
     m.matchDate,
     m.venueName,
@@ -0,0 +1,33 @@
+-- Script match_watermark.sql: per-match fingerprint for incremental ETL
+-- eventChecksum / tagChecksum: CHECKSUM_AGG over the event / tag rows -> an edited event or tag
+-- changes the fingerprint even when nbEvents / maxEventRecordID stay the same
+
+SELECT
+    E.matchID,
+    M.matchDate,
+    COUNT(*) AS nbEvents,
+    MAX(E.eventRecordID) AS maxEventRecordID,
+    CHECKSUM_AGG(BINARY_CHECKSUM(
+        E.eventRecordID, E.matchPeriod, E.eventSec, E.subEventID, E.teamID, E.playerID,
+        E.posOrigX, E.posOrigY, E.posDestX, E.posDestY
+    )) AS eventChecksum,
+    ISNULL(MAX(T.tagChecksum), 0) AS tagChecksum
+FROM EVENTS AS E
+JOIN MATCHES AS M
+    ON E.matchID = M.matchID
+LEFT JOIN (
+    SELECT
+        TE.matchID,
+        CHECKSUM_AGG(BINARY_CHECKSUM(ET.eventRecordID, ET.tagID)) AS tagChecksum
+    FROM EVENTTAGS AS ET
+    JOIN EVENTS AS TE
+        ON ET.eventRecordID = TE.eventRecordID
+    GROUP BY
+        TE.matchID
+) AS T
+    ON E.matchID = T.matchID
+GROUP BY
+    E.matchID,
+    M.matchDate
+ORDER BY
+    E.matchID;
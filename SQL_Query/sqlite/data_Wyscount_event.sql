@@ -0,0 +1,61 @@
+-- SQLite version of data_Wyscount_event.sql (offline backend)
+
+SELECT 
+    E.eventRecordID,
+    E.matchID,
+    M.competitionID,
+    M.matchDate,
+    E.matchPeriod,
+    E.eventSec,
+    EN.eventName,
+    EN.subEventName,
+    E.teamID,
+    E.posOrigX,
+    E.posOrigY,
+    E.posDestX,
+    E.posDestY,
+    E.playerID,
+    P.Sname,
+    P.pRole,
+    P.foot,
+    home.teamID AS homeTeamID,
+    away.teamID AS awayTeamID,
+    '[' || GROUP_CONCAT(T.tagID, ',') || ']' AS tagIDs
+FROM EVENTS AS E
+JOIN MATCHES AS M
+    ON E.matchID = M.matchID
+JOIN EVENTSNAME AS EN 
+    ON E.subEventID = EN.subEventID
+JOIN PLAYERS AS P
+    ON P.playerID = E.playerID
+JOIN MATCHTEAMS AS home
+    ON E.matchID = home.matchID AND home.side = 'home'
+JOIN MATCHTEAMS AS away
+    ON E.matchID = away.matchID AND away.side = 'away'
+LEFT JOIN (
+    SELECT DISTINCT eventRecordID, tagID
+    FROM EVENTTAGS
+) AS T
+    ON E.eventRecordID = T.eventRecordID
+GROUP BY
+    E.eventRecordID,
+    E.matchID,
+    M.competitionID,
+    M.matchDate,
+    E.matchPeriod,
+    E.eventSec,
+    EN.eventName,
+    EN.subEventName,
+    E.teamID,
+    E.posOrigX,
+    E.posOrigY,
+    E.posDestX,
+    E.posDestY,
+    E.playerID,
+    P.Sname,
+    P.pRole,
+    P.foot,
+    home.teamID,
+    away.teamID
+ORDER BY 
+    E.matchID, E.eventSec;
@@ -0,0 +1,40 @@
+-- SQLite version of match_watermark.sql (offline backend)
+-- SQLite không có CHECKSUM_AGG -> tổng có trọng số của các cột, mod 2^31 - 1 (số nguyên, không tràn)
+
+SELECT
+    E.matchID,
+    M.matchDate,
+    COUNT(*) AS nbEvents,
+    MAX(E.eventRecordID) AS maxEventRecordID,
+    SUM((
+        E.eventRecordID * 7
+        + CAST(COALESCE(E.eventSec, 0) * 1000 AS INTEGER) * 11
+        + COALESCE(E.subEventID, 0) * 13
+        + COALESCE(E.teamID, 0) * 17
+        + COALESCE(E.playerID, 0) * 19
+        + COALESCE(E.posOrigX, 0) * 23
+        + COALESCE(E.posOrigY, 0) * 29
+        + COALESCE(E.posDestX, 0) * 31
+        + COALESCE(E.posDestY, 0) * 37
+        + COALESCE(UNICODE(E.matchPeriod), 0) * 41
+    ) * (E.eventRecordID % 1009 + 1) % 2147483647) AS eventChecksum,
+    COALESCE(MAX(T.tagChecksum), 0) AS tagChecksum
+FROM EVENTS AS E
+JOIN MATCHES AS M
+    ON E.matchID = M.matchID
+LEFT JOIN (
+    SELECT
+        TE.matchID,
+        SUM((ET.eventRecordID * 7 + ET.tagID * 13) * (ET.tagID % 101 + 1) % 2147483647) AS tagChecksum
+    FROM EVENTTAGS AS ET
+    JOIN EVENTS AS TE
+        ON ET.eventRecordID = TE.eventRecordID
+    GROUP BY
+        TE.matchID
+) AS T
+    ON E.matchID = T.matchID
+GROUP BY
+    E.matchID,
+    M.matchDate
+ORDER BY
+    E.matchID;
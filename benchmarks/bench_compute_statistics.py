@@ -0,0 +1,125 @@
+# benchmarks/bench_compute_statistics.py
+"""
+compute_statistics (1 groupby over mask columns) vs the former per-KPI
+filter + groupby + merge chain, on a synthetic season.
+
+    python benchmarks/bench_compute_statistics.py --events 600000
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from supportFolder.statical_eventTracking import (
+    compute_statistics, compute_totalPasses, compute_totalAccuratePass, compute_meanPassLength,
+    compute_totalShot, compute_totalGoals, compute_own_goals, compute_totalDuels, compute_centroids
+)
+
+KPIS = ["totalPasses", "totalAccuratePasses", "shareAccuratePasses", "meanPassLength",
+        "totalShots", "totalGoals", "totalDuels", "centroid"]
+
+
+def make_events(n, n_matches=380, seed=42):
+    rng = np.random.default_rng(seed)
+    teams = np.arange(1, 21) * 100
+
+    match_id = rng.integers(0, n_matches, n) + 2_500_000
+    home = teams[match_id % 20]
+    away = teams[(match_id // 20 + match_id + 1) % 20]
+    away = np.where(away == home, teams[(match_id + 7) % 20], away)
+    team_id = np.where(rng.random(n) < 0.5, home, away)
+    player_id = team_id + rng.integers(0, 14, n)
+
+    return pd.DataFrame({
+        "ID": np.arange(n),
+        "matchID": match_id,
+        "eventName": rng.choice(["Pass", "Duel", "Shot", "Free kick", "Foul"], n, p=[0.5, 0.25, 0.03, 0.12, 0.1]),
+        "teamID": team_id,
+        "homeTeamID": home,
+        "awayTeamID": away,
+        "playerID": player_id,
+        "playerName": pd.Series(player_id).map(lambda p: f"Player {p}").to_numpy(),
+        "playerPosition": rng.choice(["Defender", "Midfielder", "Forward"], n),
+        "posBeforeXMeters": rng.uniform(0, 105, n),
+        "posBeforeYMeters": rng.uniform(0, 68, n),
+        "posAfterXMeters": rng.uniform(0, 105, n),
+        "posAfterYMeters": rng.uniform(0, 68, n),
+        "accurate": (rng.random(n) < 0.8).astype(int),
+        "Goal": (rng.random(n) < 0.1).astype(int),
+        "ownGoal": (rng.random(n) < 0.001).astype(int),
+    })
+
+
+def per_kpi_statistics(df_events, group_col):
+    """
+    Former approach: 1 filter + groupby + merge per KPI
+    """
+    target_col = "playerID" if group_col == "player" else "teamID"
+
+    if group_col == "player":
+        df_agg = df_events.groupby(target_col).agg(
+            playerName=("playerName", "min"),
+            playerPosition=("playerPosition", "min"),
+            teamID=("teamID", lambda x: x.value_counts().index[0]),
+            nbMatches=("matchID", "nunique")
+        ).reset_index()
+    else:
+        df_agg = df_events.groupby(target_col).agg(nbMatches=("matchID", "nunique")).reset_index()
+
+    df_agg = pd.merge(df_agg, compute_totalPasses(df_events, target_col), how="left").fillna({"totalPasses": 0})
+    df_agg = pd.merge(df_agg, compute_totalAccuratePass(df_events, target_col), how="left").fillna({"totalAccuratePasses": 0})
+    df_agg["shareAccuratePasses"] = np.where(
+        df_agg["totalPasses"] > 0,
+        np.round(df_agg["totalAccuratePasses"] / df_agg["totalPasses"] * 100, 2), 0
+    )
+    df_agg = pd.merge(df_agg, compute_meanPassLength(df_events, target_col), how="left")
+    df_agg = pd.merge(df_agg, compute_totalShot(df_events, target_col), how="left").fillna({"totalShots": 0})
+    df_agg = pd.merge(df_agg, compute_totalGoals(df_events, target_col), how="left").fillna({"totalGoals": 0})
+
+    if group_col == "team":
+        df_og = compute_own_goals(df_events, target_col)
+        df_agg = pd.merge(df_agg, df_og, how="left").fillna({"totalOwnGoals": 0})
+        df_agg["totalGoals"] += df_agg["totalOwnGoals"]
+        df_agg.drop(columns="totalOwnGoals", inplace=True)
+
+    df_agg = pd.merge(df_agg, compute_totalDuels(df_events, target_col), how="left").fillna({"totalDuels": 0})
+    df_agg = pd.merge(df_agg, compute_centroids(df_events, target_col), how="left")
+
+    return df_agg
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=600_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_events(args.events)
+    print(f"{len(df)} events, {df['matchID'].nunique()} matches")
+
+    for group_col in ["player", "team"]:
+        df_old, t_old = best_of(lambda: per_kpi_statistics(df, group_col), args.repeat)
+        df_new, t_new = best_of(lambda: compute_statistics(df, group_col, keep_kpis=KPIS), args.repeat)
+
+        pd.testing.assert_frame_equal(df_old, df_new, check_dtype=False)
+        print(f"{group_col:<8s}: per-KPI {t_old:7.3f}s  single pass {t_new:7.3f}s  (x{t_old / t_new:.1f})")
+
+
+if __name__ == "__main__":
+    main()
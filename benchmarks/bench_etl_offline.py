@@ -0,0 +1,56 @@
+# benchmarks/bench_etl_offline.py
+"""
+ETL throughput on the offline SQLite backend (reproducible, no SQL Server needed).
+
+    python benchmarks/bench_etl_offline.py --matches 20 --events 1600
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+
+def timed(label, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    print(f"{label:<32s}: {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--matches", type=int, default=20)
+    parser.add_argument("--events", type=int, default=1600)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    db_path = Path(tempfile.gettempdir()) / "wyscout_offline_bench.sqlite"
+    os.environ["SQL_BACKEND"] = "sqlite"
+    os.environ["SQL_OFFLINE_DB"] = str(db_path)
+
+    from preprocessing.offline_backend import seed_offline_database
+    from preprocessing.db_config import get_engine, get_pool_stats
+    from preprocessing.event_data import extract_events_data, transform_events
+    from supportFolder.cralw_eventData import crawl_matches_event_data
+
+    timed("seed database", seed_offline_database, db_path, n_matches=args.matches,
+          events_per_match=args.events, seed=args.seed)
+    engine = get_engine()
+
+    df_raw = timed("extract_events_data", extract_events_data, engine)
+    df_final = timed("transform_events", transform_events, df_raw, engine)
+    timed("crawl_matches_event_data", crawl_matches_event_data,
+          df_raw["matchID"].unique().tolist(), saved=False, engine=engine)
+
+    print(f"{len(df_raw)} raw events -> {len(df_final)} transformed events")
+    print(get_pool_stats(engine))
+
+
+if __name__ == "__main__":
+    main()
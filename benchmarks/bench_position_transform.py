@@ -0,0 +1,89 @@
+# benchmarks/bench_position_transform.py
+"""
+Chained convert_positions_to_meters -> flip_coordinates -> clean_position
+vs the fused transform_positions, on a synthetic season-sized frame.
+
+    python benchmarks/bench_position_transform.py --events 600000
+"""
+import sys
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from preprocessing.event_data import (
+    convert_positions_to_meters, flip_coordinates, clean_position, transform_positions
+)
+
+SUB_EVENTS = ["Simple pass", "Goal kick", "Save attempt", "Reflexes", "Shot", "Ground attacking duel", "Touch"]
+EVENT_NAMES = {"Simple pass": "Pass", "Goal kick": "Free kick", "Save attempt": "Save attempt",
+               "Reflexes": "Save attempt", "Shot": "Shot", "Ground attacking duel": "Duel",
+               "Touch": "Others on the ball"}
+
+
+def make_events(n, seed=42):
+    rng = np.random.default_rng(seed)
+    sub_event = rng.choice(SUB_EVENTS, n, p=[0.6, 0.02, 0.01, 0.01, 0.03, 0.2, 0.13])
+
+    return pd.DataFrame({
+        "eventRecordID": np.arange(n),
+        "matchID": np.repeat(np.arange(n // 1600 + 1), 1600)[:n],
+        "eventSec": rng.uniform(0, 2800, n),
+        "eventName": pd.Series(sub_event).map(EVENT_NAMES).to_numpy(),
+        "subEventName": sub_event,
+        "teamID": rng.integers(1, 21, n),
+        "playerID": rng.integers(1, 500, n),
+        "posOrigX": rng.integers(0, 101, n),
+        "posOrigY": rng.integers(0, 101, n),
+        "posDestX": rng.integers(0, 101, n),
+        "posDestY": rng.integers(0, 101, n),
+    })
+
+
+def chained(df):
+    df = convert_positions_to_meters(df.copy())   # hàm cũ sửa trực tiếp df đầu vào
+    df_flip = flip_coordinates(df)
+    return clean_position(df_flip)
+
+
+def measure(label, func, df, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = func(df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label:<10s}: best {min(times):7.3f}s  peak alloc {peak / 1024 ** 2:8.1f} MiB")
+    return result, min(times), peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=600_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_events(args.events)
+    print(f"{len(df)} events")
+
+    df_old, t_old, m_old = measure("chained", chained, df, args.repeat)
+    df_new, t_new, m_new = measure("fused", transform_positions, df, args.repeat)
+
+    pd.testing.assert_frame_equal(df_old, df_new)
+    print(f"identical output, speedup x{t_old / t_new:.1f}, peak alloc x{m_old / m_new:.1f} lower")
+
+
+if __name__ == "__main__":
+    main()
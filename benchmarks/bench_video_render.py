@@ -0,0 +1,101 @@
+# benchmarks/bench_video_render.py
+"""
+Per-frame render cost of MPLFootballAnimator (persistent collections, pitch drawn once)
+vs the former ax.clear() + draw_pitch_mpl + 1 scatter per row update.
+Each frame is rasterised with savefig like the movie writers do (encoding excluded).
+
+    python benchmarks/bench_video_render.py --events 15 --frames 60
+"""
+import io
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from supportFolder.statical_eventTracking import build_event_tracking
+from supportFolder.video_export import MPLFootballAnimator, draw_pitch_mpl, TEAM_COLOURS
+
+
+def make_phase(n, seed=42):
+    rng = np.random.default_rng(seed)
+    team = rng.choice([10, 20], n)
+
+    return pd.DataFrame({
+        "ID": np.arange(n),
+        "eventSec": np.sort(rng.uniform(0, 30, n)),
+        "eventName": rng.choice(["Pass", "Duel", "Shot"], n, p=[0.6, 0.3, 0.1]),
+        "subEventName": rng.choice(["Simple pass", "High pass", "Air duel"], n),
+        "teamID": team,
+        "homeTeamID": 10,
+        "playerID": team * 100 + rng.integers(1, 12, n),
+        "playerName": [f"Player {i}" for i in range(n)],
+        "posBeforeXMeters": rng.uniform(1, 104, n),
+        "posBeforeYMeters": rng.uniform(1, 67, n),
+        "posAfterXMeters": rng.uniform(1, 104, n),
+        "posAfterYMeters": rng.uniform(1, 67, n),
+        "Goal": 0,
+    })
+
+
+def legacy_update(animator, frame_id):
+    """
+    Former _update: redraw the pitch and 1 scatter per entity row
+    """
+    ax = animator.ax
+    ax.clear()
+    draw_pitch_mpl(ax, animator.pitch_length, animator.pitch_width)
+
+    fdf = animator.df[animator.df["frame"] == frame_id]
+    styles = {
+        "PLAYER_OWNER": dict(s=160, edgecolors="white", linewidths=2, zorder=3),
+        "PLAYER_TARGET": dict(s=110, alpha=0.6, edgecolors="white", linewidths=1.5, zorder=2),
+        "BALL": dict(s=40, edgecolors="white", linewidths=1, zorder=4),
+    }
+    for entity_type, style in styles.items():
+        for _, row in fdf[fdf["entityType"] == entity_type].iterrows():
+            colour = TEAM_COLOURS["Ball"] if entity_type == "BALL" else TEAM_COLOURS.get(row["team"], "gray")
+            ax.scatter(row["xPos"], row["yPos"], c=colour, **style)
+
+    ax.set_title(f"Frame: {frame_id}", fontsize=12)
+
+
+def render(animator, update, frames):
+    start = time.perf_counter()
+    for frame in frames:
+        update(frame)
+        animator.fig.savefig(io.BytesIO(), format="rgba", dpi=animator.fig.dpi)
+    return (time.perf_counter() - start) / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=15)
+    parser.add_argument("--frames", type=int, default=60)
+    args = parser.parse_args()
+
+    df_phase = make_phase(args.events)
+    tracking = build_event_tracking(df_phase, df_phase["ID"], fps=25)
+    print(f"{len(tracking)} tracking rows, {tracking['frame'].nunique()} frames")
+
+    old = MPLFootballAnimator(tracking)
+    frames = old.frames[:args.frames]
+    t_old = render(old, lambda f: legacy_update(old, f), frames)
+
+    new = MPLFootballAnimator(tracking)
+    new._init()
+    t_new = render(new, new._update, range(len(frames)))
+
+    print(f"per frame: redraw {t_old * 1000:6.1f}ms  persistent {t_new * 1000:6.1f}ms  (x{t_old / t_new:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,216 @@
 #preprocessing/db_config.py
 import os
+import json
+import time
 import urllib
+import threading
 import subprocess
+from pathlib import Path
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
 
 load_dotenv()
 
-    
-def get_engine():
-    try:
-        user = os.getenv("SQL_USER")
-        password = os.getenv("SQL_PASS")
-        db = os.getenv("SQL_DB")
-        port = os.getenv("SQL_PORT", "1433")
-        host = os.getenv("WINDOWS_HOST_IP")
-
-        sql_uri =(
-            f"mssql+pyodbc://{user}:{password}"
-            f"@{host}:{port}/{db}"
-            f"?driver=ODBC+Driver+18+for+SQL+Server"
-            f"&TrustServerCertificate=yes"
-        )
-
-        engine = create_engine(sql_uri)
+ROOT = Path(__file__).resolve().parent.parent
+
+# "mssql" (SQL Server production) | "sqlite" (file offline, xem preprocessing/offline_backend.py)
+SQL_BACKEND = os.getenv("SQL_BACKEND", "mssql")
+OFFLINE_DB_PATH = Path(os.getenv("SQL_OFFLINE_DB", ROOT / "dataset" / "offline" / "wyscout_offline.sqlite"))
+
+# Cấu hình connection pool (override bằng biến môi trường)
+POOL_CONFIG = {
+    "pool_size": int(os.getenv("SQL_POOL_SIZE", "8")),
+    "max_overflow": int(os.getenv("SQL_MAX_OVERFLOW", "4")),
+    "pool_timeout": int(os.getenv("SQL_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("SQL_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": os.getenv("SQL_POOL_PRE_PING", "1") == "1",
+    "fast_executemany": os.getenv("SQL_FAST_EXECUTEMANY", "1") == "1",
+}
+
+# Registry: 1 engine (1 pool) dùng chung cho toàn process
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
+
+# Danh sách matchID truyền bằng 1 tham số JSON duy nhất
+# -> SQL Server dùng lại 1 execution plan cho mọi danh sách, không phải compile lại mỗi trận
+MATCH_LIST_FILTER = "IN (SELECT CAST([value] AS INT) FROM OPENJSON(:matchIDs))"
+
+MATCH_LIST_FILTERS = {
+    "mssql": MATCH_LIST_FILTER,
+    "sqlite": "IN (SELECT value FROM json_each(:matchIDs))",
+}
+
+
+def match_list_filter(engine=None) -> str:
+    """
+    Dialect-specific "IN (<JSON list :matchIDs>)" clause
+    """
+    dialect = engine.dialect.name if engine is not None else "mssql"
+    return MATCH_LIST_FILTERS.get(dialect, MATCH_LIST_FILTER)
+
+
+def match_list_params(matchIDs) -> dict:
+    return {"matchIDs": json.dumps([int(m) for m in matchIDs])}
+
+
+def resolve_sql_file(sql_folder: Path, filename: str, engine=None) -> Path:
+    """
+    SQL_Query/<dialect>/<filename> when a translated version exists (e.g. sqlite), else SQL_Query/<filename>
+    """
+    if engine is not None:
+        dialect_path = Path(sql_folder) / engine.dialect.name / filename
+        if dialect_path.exists():
+            return dialect_path
+    return Path(sql_folder) / filename
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long callers wait for a connection checkout,
+    apart from the time spent opening new DBAPI connections (connectSeconds)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        self.wait_stats = {
+            "checkouts": 0, "waitSeconds": 0.0, "maxWaitSeconds": 0.0, "timeouts": 0,
+            "connects": 0, "connectSeconds": 0.0,
+        }
+
+    def _create_connection(self):
+        start = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            elapsed = time.perf_counter() - start
+            self._local.connect_seconds = getattr(self._local, "connect_seconds", 0.0) + elapsed
+            with self._stats_lock:
+                self.wait_stats["connects"] += 1
+                self.wait_stats["connectSeconds"] += elapsed
+
+    def _do_get(self):
+        # QueuePool._do_get tự gọi lại chính nó -> chỉ đo ở lần gọi ngoài cùng
+        if getattr(self._local, "in_get", False):
+            return super()._do_get()
+
+        self._local.in_get = True
+        self._local.connect_seconds = 0.0
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.wait_stats["timeouts"] += 1
+            raise
+        finally:
+            self._local.in_get = False
+
+        # Thời gian chờ pool = tổng - thời gian mở kết nối mới (overflow)
+        wait = max(time.perf_counter() - start - self._local.connect_seconds, 0.0)
+        with self._stats_lock:
+            self.wait_stats["checkouts"] += 1
+            self.wait_stats["waitSeconds"] += wait
+            self.wait_stats["maxWaitSeconds"] = max(self.wait_stats["maxWaitSeconds"], wait)
+
+        return conn
+
+
+def build_sql_uri(backend: str = None):
+    backend = backend or SQL_BACKEND
+
+    if backend == "sqlite":
+        return f"sqlite:///{OFFLINE_DB_PATH}"
+
+    if backend != "mssql":
+        raise ValueError(f"SQL_BACKEND không hợp lệ: {backend}")
+
+    user = os.getenv("SQL_USER")
+    password = os.getenv("SQL_PASS")
+    db = os.getenv("SQL_DB")
+    port = os.getenv("SQL_PORT", "1433")
+    host = os.getenv("WINDOWS_HOST_IP")
+
+    return (
+        f"mssql+pyodbc://{user}:{password}"
+        f"@{host}:{port}/{db}"
+        f"?driver=ODBC+Driver+18+for+SQL+Server"
+        f"&TrustServerCertificate=yes"
+    )
+
+
+def get_engine(name: str = "default", backend: str = None, **pool_options):
+    """
+    Return the process-wide engine registered under name (created on first call).
+
+    backend: "mssql" | "sqlite" (default: env SQL_BACKEND)
+    pool_options override POOL_CONFIG (pool_size, max_overflow, pool_timeout,
+    pool_recycle, pool_pre_ping, fast_executemany); they only apply when the engine is created.
+    """
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(name)
+        if engine is not None:
+            return engine
+
+        try:
+            backend = backend or SQL_BACKEND
+            config = {**POOL_CONFIG, **pool_options}
+            if backend != "mssql":
+                config.pop("fast_executemany", None)   # tham số riêng của pyodbc
+
+            engine = create_engine(
+                build_sql_uri(backend),
+                poolclass=InstrumentedQueuePool,
+                **config
+            )
+        except Exception as e:
+            raise RuntimeError(f"Loi tao SQL Engine: {e}")
+
+        _ENGINES[name] = engine
         return engine
-    except Exception as e:
-        raise RuntimeError(f"Loi tao SQL Engine: {e}")
 
 
-    
\ No newline at end of file
+def get_pool_stats(engine=None, name: str = "default") -> dict:
+    """
+    Pool usage: size / checked out / overflow + checkout wait times.
+    High waitSeconds or timeouts > 0 -> extraction is connection-starved (raise pool_size or lower workers).
+    High connectSeconds -> slow server / network login, not pool contention.
+    """
+    if engine is None:
+        engine = _ENGINES.get(name)
+        if engine is None:
+            return {}
+
+    pool = engine.pool
+    stats = {"pool": pool.status()}
+
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checkedIn": pool.checkedin(),
+            "checkedOut": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+
+    wait_stats = dict(getattr(pool, "wait_stats", {}))
+    if wait_stats:
+        checkouts = wait_stats["checkouts"]
+        wait_stats["avgWaitSeconds"] = wait_stats["waitSeconds"] / checkouts if checkouts else 0.0
+        connects = wait_stats["connects"]
+        wait_stats["avgConnectSeconds"] = wait_stats["connectSeconds"] / connects if connects else 0.0
+        stats.update(wait_stats)
+
+    return stats
+
+
+def dispose_engines():
+    """
+    Close every pooled connection (end of a batch job / before forking worker processes)
+    """
+    with _ENGINES_LOCK:
+        for engine in _ENGINES.values():
+            engine.dispose()
+        _ENGINES.clear()
@@ -0,0 +1,84 @@
+#preprocessing/etl_manifest.py
+import sys
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+## CẤU HÌNH ĐƯỜNG DẪN
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+DATA_TRANSFORM_FOLDER = ROOT / "dataset" / "data_transforms"
+MANIFEST_PATH = DATA_TRANSFORM_FOLDER / "etl_manifest.json"
+
+# nbEvents / maxEventRecordID: trận mới, event thêm / xóa; checksum: event / tag bị sửa
+FINGERPRINT_COLS = ["nbEvents", "maxEventRecordID", "eventChecksum", "tagChecksum"]
+
+
+def load_manifest(path: Path = MANIFEST_PATH) -> dict:
+    """
+    Load the ETL manifest (watermark + per-match fingerprint). Empty manifest if never run.
+    """
+    path = Path(path)
+    if not path.exists():
+        return {"watermark": {}, "matches": {}}
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict, path: Path = MANIFEST_PATH):
+    """
+    Write manifest atomically (tmp file + rename) so an interrupted run keeps the previous watermark
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    tmp_path.replace(path)
+
+
+def find_changed_matches(df_watermark: pd.DataFrame, manifest: dict) -> list:
+    """
+    matchIDs that are new, or whose fingerprint (FINGERPRINT_COLS) differs from the manifest
+    (matches recorded before the checksum columns existed are reprocessed once)
+
+    df_watermark: output of match_watermark.sql (matchID, matchDate, FINGERPRINT_COLS)
+    """
+    known = manifest.get("matches", {})
+    changed = []
+
+    for row in df_watermark.itertuples(index=False):
+        previous = known.get(str(row.matchID))
+        current = {col: int(getattr(row, col)) for col in FINGERPRINT_COLS}
+
+        if previous is None or any(previous.get(col) != current[col] for col in FINGERPRINT_COLS):
+            changed.append(int(row.matchID))
+
+    return changed
+
+
+def update_manifest(manifest: dict, df_watermark: pd.DataFrame, matchIDs) -> dict:
+    """
+    Record fingerprints of the processed matches and move the watermark forward
+    """
+    matches = manifest.setdefault("matches", {})
+    df_done = df_watermark[df_watermark["matchID"].isin(matchIDs)]
+
+    for row in df_done.itertuples(index=False):
+        matches[str(row.matchID)] = {col: int(getattr(row, col)) for col in FINGERPRINT_COLS}
+
+    if not df_watermark.empty:
+        manifest["watermark"] = {
+            "maxMatchID": int(df_watermark["matchID"].max()),
+            "maxMatchDate": str(df_watermark["matchDate"].max()),
+            "maxEventRecordID": int(df_watermark["maxEventRecordID"].max()),
+        }
+
+    manifest["updatedAt"] = datetime.now().isoformat(timespec="seconds")
+    return manifest
@@ -3,11 +3,19 @@
 import sys
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
 
 
-from preprocessing.db_config import get_engine
+from sqlalchemy import text
+
+from preprocessing.db_config import get_engine, match_list_filter, match_list_params, resolve_sql_file
 from preprocessing.tagsname import extract_tags_mapping_query
+from preprocessing.event_store import write_event_store
+from preprocessing.event_schema import apply_event_schema, RAW_EVENT_SCHEMA
+from preprocessing.kpi_cube import write_kpi_cube
+from preprocessing.etl_manifest import load_manifest, save_manifest, find_changed_matches, update_manifest
 
 ## CẤU HÌNH ĐƯỜNG DẪN
 ROOT = Path(__file__).resolve().parent.parent
@@ -22,29 +30,54 @@ DATA_TRANSFORM_FOLDER = DATASET_FOLEDER / "data_transforms"
 
 events_filename = 'data_Wyscount_event.sql'
 tagsname_filename = 'tagsName.sql'
+watermark_filename = 'match_watermark.sql'
 
 FIELD_LENGTH = 105
 FIELD_WIDTH = 68
 
+EXTRACT_CHUNKSIZE = 100_000
+
 
 #=====LOAD FILE SQL
-def load_sql_file(filename):
-    path = SQL_FOLDER /filename
+def load_sql_file(filename, engine = None):
+    path = resolve_sql_file(SQL_FOLDER, filename, engine)
     if not path.exists():
         raise FileNotFoundError(f"Khong tim thay file SQL: {path}")
     with open(path, 'r', encoding='utf-8') as f:
         return f.read()
+
+
+def add_match_filter(query, engine = None):
+    """
+    Restrict data_Wyscount_event.sql to the bound :matchIDs list (WHERE before GROUP BY)
+    """
+    return query.replace("GROUP BY", f"WHERE E.matchID {match_list_filter(engine)}\nGROUP BY", 1)
+
     
 #=====EXTRACT EVENT
-def extract_events_data(engine = None, save = False):
+def extract_events_data(engine = None, save = False, chunksize = None, matchIDs = None):
     """
     Extract data event.
+
+    matchIDs: only extract these matches (incremental ETL)
+
+    chunksize: streaming mode -> rows are fetched chunk by chunk and appended to
+    events_raw.parquet as record batches, so peak memory is bounded by the chunk size.
+    The table is never held in memory: the path of the parquet file is returned instead of a DataFrame.
     """
     #Extract event dataset and save file extractions
     if engine is None:
         engine = get_engine()
-    event_query = load_sql_file(events_filename)
-    df_events = pd.read_sql(event_query, engine)
+    event_query = load_sql_file(events_filename, engine)
+    params = None
+    if matchIDs is not None:
+        event_query = text(add_match_filter(event_query, engine))
+        params = match_list_params(matchIDs)
+
+    if chunksize:
+        return stream_events_data(engine, event_query, chunksize, params=params)
+
+    df_events = pd.read_sql(event_query, engine, params=params)
 
 
     if save:
@@ -55,33 +88,115 @@ def extract_events_data(engine = None, save = False):
     return df_events
 
 
+def stream_events_data(engine, query, chunksize = EXTRACT_CHUNKSIZE, output_path = None, params = None):
+    """
+    Stream the result of query into one parquet file, one row group per chunk.
+
+    Chunks are cast to RAW_EVENT_SCHEMA before writing: the parquet schema is declared,
+    not inferred from chunk 1 (a column that is all NULL in chunk 1 would be typed null).
+    """
+    if output_path is None:
+        output_path = DATA_EXTRACTION_FOLDER / "events_raw.parquet"
+
+    writer = None
+    nb_rows = 0
+
+    try:
+        with engine.connect().execution_options(stream_results=True) as conn:
+            for chunk in pd.read_sql(query, conn, chunksize=chunksize, params=params):
+                chunk = apply_event_schema(chunk, RAW_EVENT_SCHEMA)
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                elif table.schema != writer.schema:
+                    # Cột ngoài RAW_EVENT_SCHEMA: theo kiểu của chunk đầu
+                    table = table.cast(writer.schema)
+
+                writer.write_table(table)
+                nb_rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    print(f"Save a backup of raw data events (streaming): {output_path} ({nb_rows} row)")
+    return output_path
+
+
 #=====MAPPING TAGS INTO EVENTS
-def apply_tags_pivot(df_events, engine, save = False):
+TAG_MASK_COL = 'tagMask'
+MAX_TAG_BITS = 64
+
+
+def build_tag_bits(descriptions):
+    """
+    Description -> bit index in tagMask (sorted by name, stable between runs)
+    """
+    names = sorted(pd.unique(descriptions.dropna()))
+    if len(names) > MAX_TAG_BITS:
+        raise ValueError(f"{len(names)} tag types, tagMask (uint64) chi chua duoc {MAX_TAG_BITS}")
+
+    return {name: bit for bit, name in enumerate(names)}
+
+
+def build_tag_mask(df_events, df_tags, tag_bits):
+    """
+    One uint64 per event: bit tag_bits[Description] is set when the event has that tag
+    """
+    pairs = df_tags[['eventRecordID', 'Description']].dropna().drop_duplicates()
+    bits = pairs['Description'].map(tag_bits).to_numpy(np.uint64)
+
+    # Mỗi (event, tag) là duy nhất -> tổng các lũy thừa của 2 == phép OR
+    masks = (
+        pd.Series(np.left_shift(np.uint64(1), bits), index=pairs['eventRecordID'].to_numpy())
+        .groupby(level=0).sum()
+    )
+
+    return masks.reindex(df_events['eventRecordID'].to_numpy(), fill_value=0).to_numpy(np.uint64)
+
+
+def get_tag_flag(df, description):
+    """
+    0/1 (uint8) flag of a tag Description for every row.
+
+    Reads the tagMask bit (bit map in df.attrs["tagBits"]); falls back to a dense
+    column of the same name (older files), else all 0.
+    """
+    tag_bits = df.attrs.get('tagBits', {})
+    if TAG_MASK_COL in df.columns and description in tag_bits:
+        bit = np.uint64(tag_bits[description])
+        flags = (df[TAG_MASK_COL].to_numpy(np.uint64) >> bit) & np.uint64(1)
+        return pd.Series(flags.astype(np.uint8), index=df.index)
+
+    if description in df.columns:
+        return df[description].fillna(0).astype(np.uint8)
+
+    return pd.Series(np.zeros(len(df), dtype=np.uint8), index=df.index)
+
+
+def apply_tags_pivot(df_events, engine, save = False, matchIDs = None):
     """
     Extract tags name from tagsName.sql and mapping tags with events
+
+    Tags are stored as one uint64 bitmask column (tagMask) instead of one int column per tag;
+    read a tag with get_tag_flag(df, Description).
     """
-    df_tags = extract_tags_mapping_query(engine, save)
-    tags_pivot = df_tags.pivot_table(
-        index= 'eventRecordID',
-        columns='Description',
-        aggfunc='size',
-        fill_value=0
-    ).reset_index()
+    df_tags = extract_tags_mapping_query(engine, save, matchIDs=matchIDs)
 
-    tag_cols = [c for c in tags_pivot.columns if c != 'eventRecordID']
-    tags_pivot[tag_cols] = (tags_pivot[tag_cols] > 0).astype(int)
+    tag_bits = build_tag_bits(df_tags['Description'])
 
-    df = pd.merge(df_events, tags_pivot, on='eventRecordID', how='left')
-    df[tag_cols] = df[tag_cols].fillna(0).astype(int)
+    df = df_events.copy()
+    df[TAG_MASK_COL] = build_tag_mask(df, df_tags, tag_bits)
+    df.attrs['tagBits'] = tag_bits
 
-    if 'Accurate' in df.columns:
-        df['accurate_flag'] = df['Accurate']
-    elif 'Not accurate' in df.columns:
-        df['accurate_flag'] = 1 - df['Not accurate']
+    if 'Accurate' in tag_bits:
+        df['accurate_flag'] = get_tag_flag(df, 'Accurate').astype(int)
+    elif 'Not accurate' in tag_bits:
+        df['accurate_flag'] = 1 - get_tag_flag(df, 'Not accurate').astype(int)
     else:
         df['accurate_flag'] = 0
 
-    return df, tag_cols
+    return df, list(tag_bits)
 
 
 #=====POSSITION PROCESSING
@@ -140,6 +255,52 @@ def clean_position(df):
     return df
 
 
+POSITION_COLS = ['posOrigX', 'posOrigY', 'posDestX', 'posDestY']
+
+
+def transform_positions(df, field_length = FIELD_LENGTH, field_width = FIELD_WIDTH, clean = True):
+    """
+    convert_positions_to_meters + flip_coordinates + clean_position in one pass over NumPy arrays.
+
+    Same values as the 3 chained functions (meters rounded to 2 decimals, then shots in the
+    own half are flipped). clean: drop rows whose posBefore is NaN or outside the pitch.
+    df is not modified; the only copy is the final (filtered) frame.
+    """
+    # So sánh chuỗi bằng pandas (không đổi cột string sang mảng object)
+    goal_kick = (df['subEventName'] == 'Goal kick').to_numpy()
+    save = df['subEventName'].isin(['Save attempt', 'Reflexes']).to_numpy()
+
+    orig_x = np.where(goal_kick, 5, np.where(save, 0, df['posOrigX'].to_numpy()))
+    orig_y = np.where(goal_kick | save, 50, df['posOrigY'].to_numpy())
+
+    before_x = np.round(orig_x * field_length / 100, 2)
+    before_y = np.round(orig_y * field_width / 100, 2)
+    after_x = np.round(df['posDestX'].to_numpy() * field_length / 100, 2)
+    after_y = np.round(df['posDestY'].to_numpy() * field_width / 100, 2)
+
+    flip = (df['eventName'] == 'Shot').to_numpy() & (before_x < field_length / 2)
+    before_x = np.where(flip, field_length - before_x, before_x)
+    after_x = np.where(flip, field_length - after_x, after_x)
+    before_y = np.where(flip, field_width - before_y, before_y)
+    after_y = np.where(flip, field_width - after_y, after_y)
+
+    keep = slice(None)
+    if clean:
+        # NaN so sánh luôn False -> bị loại như dropna
+        keep = (
+            (before_x >= 0) & (before_x <= field_length)
+            & (before_y >= 0) & (before_y <= field_width)
+        )
+
+    out = df.loc[keep, [c for c in df.columns if c not in POSITION_COLS]]
+    out['posBeforeXMeters'] = before_x[keep]
+    out['posBeforeYMeters'] = before_y[keep]
+    out['posAfterXMeters'] = after_x[keep]
+    out['posAfterYMeters'] = after_y[keep]
+
+    return out
+
+
 
 def compute_possession(df):
     """
@@ -167,9 +328,9 @@ def compute_bodyPartShot(df):
     """
     Docstring for compute_bodyPartShot
     """
-    left = df.get("Left foot", 0)
-    right = df.get("Right foot", 0)
-    head = df.get("Head/body", 0)
+    left = get_tag_flag(df, "Left foot")
+    right = get_tag_flag(df, "Right foot")
+    head = get_tag_flag(df, "Head/body")
 
     df["bodyPartShot"] = np.select(
         [left == 1, head == 1, right == 1],
@@ -202,46 +363,85 @@ def finalized_transform(df):
     df.rename(columns = rename_map, inplace=True)
 
     for col in ['Goal', 'Own goal', 'Counter attack']:
-        if col not in df.columns:
-            df[col] = 0
-        df[col] = df[col].fillna(0).astype(int)
+        df[col] = get_tag_flag(df, col).astype(int)
 
 
     #Sort columns to keep
     cols_to_keep = [
-        'ID', 'matchID', 'matchPeriod', 'eventSec', 'eventName', 'subEventName',
+        'ID', 'matchID', 'competitionID', 'matchDate', 'matchPeriod', 'eventSec', 'eventName', 'subEventName',
         'teamID', 'posBeforeXMeters', 'posBeforeYMeters',
         'posAfterXMeters', 'posAfterYMeters',
         'playerID', 'playerName', 'playerPosition', 'playerStrongFoot',
         'teamPossession', 'homeTeamID', 'awayTeamID',
-        'Goal', 'Own goal', 'Counter attack',
+        'accurate', 'Goal', 'Own goal', 'Counter attack',
         'bodyPartShot', 'bodyPartShotCode'
     ]
 
     final_cols = [c for c in cols_to_keep if c in df.columns]
     
-    return df[final_cols]
+    return apply_event_schema(df[final_cols])
+
+def transform_events(df_raw, engine, save = False, matchIDs = None):
+    df_map, tag_cols = apply_tags_pivot(df_raw, engine, save, matchIDs=matchIDs)
 
-def run_pipeline(save = False):
+    df = transform_positions(df_map)
+
+    return finalized_transform(df)
+
+
+def run_pipeline(save = False, incremental = False):
+    """
+    incremental: only extract / transform matches that are new or changed since the last run
+    (fingerprints in etl_manifest.json) and replace their partitions in the event store
+
+    save: a full run also seeds the manifest with the fingerprints of every processed match,
+    so the next incremental run starts from this load
+    """
     engine = get_engine()
 
-    df_raw = extract_events_data(engine, save)
+    if incremental:
+        return run_incremental_pipeline(engine)
 
-    df_map, tag_cols = apply_tags_pivot(df_raw, engine, save)
+    # Watermark đọc trước khi extract: dữ liệu sửa trong lúc chạy -> lần incremental sau sẽ thấy
+    df_watermark = pd.read_sql(load_sql_file(watermark_filename, engine), engine) if save else None
 
-    df = convert_positions_to_meters(df_map)
-    df_flip = flip_coordinates(df)
-    df = clean_position(df)
+    df_raw = extract_events_data(engine, save)
 
-    df_final = finalized_transform(df_flip)
+    df_final = transform_events(df_raw, engine, save)
 
     if save:
-        output_path = DATA_TRANSFORM_FOLDER / "event_data_transform.parquet"
-        df_final.to_parquet(output_path, engine='pyarrow', index = False)
+        write_event_store(df_final)
+        write_kpi_cube(df_final)
+        save_manifest(update_manifest(load_manifest(), df_watermark, df_final["matchID"].unique()))
         print(f"Transform Event Data Compeletely!")
 
     return df_final
 
+
+def run_incremental_pipeline(engine = None):
+    if engine is None:
+        engine = get_engine()
+
+    manifest = load_manifest()
+    df_watermark = pd.read_sql(load_sql_file(watermark_filename, engine), engine)
+
+    changed_ids = find_changed_matches(df_watermark, manifest)
+    if not changed_ids:
+        print("Event store is up to date (watermark: {})".format(manifest.get("watermark")))
+        return pd.DataFrame()
+
+    print(f"Incremental ETL: {len(changed_ids)} new/changed match")
+
+    df_raw = extract_events_data(engine, matchIDs=changed_ids)
+    df_final = transform_events(df_raw, engine, matchIDs=changed_ids)
+
+    write_event_store(df_final)
+    write_kpi_cube(df_final)
+    save_manifest(update_manifest(manifest, df_watermark, changed_ids))
+
+    print(f"Transform Event Data Compeletely!")
+    return df_final
+
 if __name__ == "__main__":
     run_pipeline(save = False)
 
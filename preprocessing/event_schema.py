@@ -0,0 +1,132 @@
+#preprocessing/event_schema.py
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+## CẤU HÌNH ĐƯỜNG DẪN
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+
+# ===============================
+# EVENT SCHEMA
+# ===============================
+# Output của finalized_transform (event_data.py) và preprocessing_events (video_tracking.py)
+# - nhãn lặp lại, ít giá trị -> category (dictionary-encoded trong parquet)
+# - ngày -> datetime64[ns] (so sánh / lọc theo khoảng, timestamp trong parquet)
+# - tọa độ -> float32, eventSec giữ float64 (so sánh thời gian chính xác)
+# - flag 0/1 -> uint8, ID -> int32 (Int32 khi cột có thể thiếu giá trị)
+EVENT_SCHEMA = {
+    "ID": "int32",
+    "matchID": "int32",
+    "competitionID": "int32",
+    "matchDate": "datetime64[ns]",
+    "matchPeriod": "category",
+    "eventSec": "float64",
+    "eventSecEnd": "float64",
+    "startFrame": "int32",
+    "endFrame": "int32",
+    "eventName": "category",
+    "subEventName": "category",
+    "teamID": "int32",
+    "Team": "category",
+    "posBeforeXMeters": "float32",
+    "posBeforeYMeters": "float32",
+    "posAfterXMeters": "float32",
+    "posAfterYMeters": "float32",
+    "playerID": "int32",
+    "playerName": "category",
+    "playerPosition": "category",
+    "playerStrongFoot": "category",
+    "toPlayerID": "Int32",
+    "toPlayerName": "category",
+    "teamPossession": "Int32",
+    "homeTeamID": "int32",
+    "awayTeamID": "int32",
+    "accurate": "uint8",
+    "Goal": "uint8",
+    "Own goal": "uint8",
+    "ownGoal": "uint8",
+    "Counter attack": "uint8",
+    "bodyPartShot": "category",
+    "bodyPartShotCode": "uint8",
+}
+
+# Cột output của preprocessing_events (video_tracking.py) = cột của event 1 trận trên dashboard
+TRACKING_EVENT_COLUMNS = [
+    'ID', 'matchID', 'competitionID', 'matchDate', 'matchPeriod', 'eventSec', 'eventSecEnd',
+    'startFrame', 'endFrame', 'eventName', 'subEventName',
+    'teamID', 'Team', 'posBeforeXMeters', 'posBeforeYMeters',
+    'posAfterXMeters', 'posAfterYMeters', 'playerID', 'playerName',
+    'playerPosition', 'toPlayerID', 'toPlayerName', 'homeTeamID',
+    'awayTeamID', 'accurate', 'Goal', 'ownGoal',
+]
+
+# Output của data_Wyscount_event.sql (events_raw.parquet, extract_events_data streaming)
+# Kiểu cố định -> mọi chunk có cùng schema, kể cả khi 1 cột toàn NULL trong chunk đầu
+# - tọa độ % -> float64 (NULL không đổi int -> float giữa các chunk)
+RAW_EVENT_SCHEMA = {
+    "eventRecordID": "int64",
+    "matchID": "int64",
+    "competitionID": "int64",
+    "matchDate": "datetime64[ns]",
+    "matchPeriod": "string",
+    "eventSec": "float64",
+    "eventName": "string",
+    "subEventName": "string",
+    "teamID": "int64",
+    "posOrigX": "float64",
+    "posOrigY": "float64",
+    "posDestX": "float64",
+    "posDestY": "float64",
+    "playerID": "int64",
+    "Sname": "string",
+    "pRole": "string",
+    "foot": "string",
+    "homeTeamID": "int64",
+    "awayTeamID": "int64",
+    "tagIDs": "string",
+}
+
+# Cột flag thiếu (partition của pipeline khác) -> 0
+FLAG_COLS = [col for col, dtype in EVENT_SCHEMA.items() if dtype == "uint8"]
+
+
+def _cast_column(series: pd.Series, col: str, dtype: str) -> pd.Series:
+    if dtype == "category":
+        if not isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype("category")
+        # ordered -> groupby(...).agg("min") vẫn chạy như với chuỗi (thứ tự chữ cái)
+        return series if series.cat.ordered else series.cat.as_ordered()
+
+    if str(series.dtype) == dtype:
+        return series
+
+    if dtype.startswith("datetime64"):
+        # chuỗi / category ngày (file cũ, pipeline tracking) -> datetime
+        return pd.to_datetime(series.astype("object"), errors="coerce").astype(dtype)
+
+    if series.hasnans and pd.api.types.is_integer_dtype(dtype.lower()):
+        if col in FLAG_COLS:
+            series = series.fillna(0)
+        else:
+            dtype = dtype.capitalize()   # int32 -> Int32 (nullable)
+
+    return series.astype(dtype)
+
+
+def apply_event_schema(df: pd.DataFrame, schema: dict = EVENT_SCHEMA) -> pd.DataFrame:
+    """
+    Cast the columns of df that appear in schema (other columns are left as they are).
+    Column order and attrs are kept; df itself is not modified.
+    """
+    df = df.copy(deep=False)
+
+    for col, dtype in schema.items():
+        if col in df.columns:
+            df[col] = _cast_column(df[col], col, dtype)
+
+    return df
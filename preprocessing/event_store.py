@@ -0,0 +1,220 @@
+#preprocessing/event_store.py
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+## CẤU HÌNH ĐƯỜNG DẪN
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from preprocessing.event_schema import apply_event_schema, TRACKING_EVENT_COLUMNS
+
+DATA_TRANSFORM_FOLDER = ROOT / "dataset" / "data_transforms"
+EVENT_STORE_FOLDER = DATA_TRANSFORM_FOLDER / "event_store"
+
+# competitionID=.../season=.../matchID=.../pipeline=.../part-0.parquet
+PARTITION_COLS = ["competitionID", "season", "matchID"]
+PIPELINE_COL = "pipeline"
+SEASON_PIPELINE = "season"          # event_data.run_pipeline (shot flip / goal-kick fix)
+TRACKING_PIPELINE = "tracking"      # video_tracking (per-match, raw meters, frames)
+SORT_COLS = ["matchID", "matchPeriod", "eventSec"]
+ROW_GROUP_SIZE = 50_000
+
+# Mùa giải bắt đầu từ tháng 8 (tháng 6-7 như Euro / World Cup thuộc mùa trước)
+SEASON_START_MONTH = 8
+UNKNOWN_PARTITION = -1
+
+SCHEMA_FILE = "_common_metadata"
+
+EVENT_PARTITIONING = ds.partitioning(
+    pa.schema([(col, pa.int32()) for col in PARTITION_COLS] + [(PIPELINE_COL, pa.string())]),
+    flavor="hive"
+)
+
+
+#=====PARTITION KEYS
+def compute_season(match_date: pd.Series) -> pd.Series:
+    """
+    Season start year from matchDate (2017-09-10 -> 2017, 2018-03-01 -> 2017)
+    """
+    dates = pd.to_datetime(match_date, errors="coerce")
+    season = dates.dt.year - (dates.dt.month < SEASON_START_MONTH).astype(int)
+    return season.fillna(UNKNOWN_PARTITION).astype("int32")
+
+
+def add_partition_columns(df_events: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add competitionID / season partition keys (-1 when the source query did not provide them)
+    """
+    df = df_events.copy()
+
+    if "competitionID" in df.columns:
+        df["competitionID"] = df["competitionID"].fillna(UNKNOWN_PARTITION).astype("int32")
+    else:
+        df["competitionID"] = UNKNOWN_PARTITION
+
+    if "matchDate" in df.columns:
+        df["season"] = compute_season(df["matchDate"])
+    else:
+        df["season"] = UNKNOWN_PARTITION
+
+    df["competitionID"] = df["competitionID"].astype("int32")
+    df["season"] = df["season"].astype("int32")
+    df["matchID"] = df["matchID"].astype("int32")
+
+    return df
+
+
+#=====SCHEMA
+def read_store_schema(store_dir: Path = EVENT_STORE_FOLDER):
+    path = Path(store_dir) / SCHEMA_FILE
+    if not path.exists():
+        return None
+    return pq.read_schema(path)
+
+
+def update_store_schema(store_dir: Path, table: pa.Table):
+    """
+    Keep the union of all written columns in _common_metadata so that partitions
+    written before / after a schema change can be read together.
+    """
+    new_schema = table.schema.remove_metadata()
+    old_schema = read_store_schema(store_dir)
+
+    if old_schema is not None:
+        # Kiểu mới (theo EVENT_SCHEMA) được ưu tiên, trừ cột toàn null;
+        # file cũ (vd: string thay vì dictionary) được cast khi đọc
+        fields = {field.name: field for field in old_schema}
+        for field in new_schema:
+            if field.name not in fields or not pa.types.is_null(field.type):
+                fields[field.name] = field
+        new_schema = pa.schema(list(fields.values()))
+
+    pq.write_metadata(new_schema, Path(store_dir) / SCHEMA_FILE)
+
+
+#=====WRITE
+def _remove_legacy_files(store_dir: Path, df: pd.DataFrame):
+    """
+    Files written before the pipeline partition (directly in matchID=...) of the written matches
+    """
+    keys = df[PARTITION_COLS].drop_duplicates().itertuples(index=False)
+    for competitionID, season, matchID in keys:
+        match_dir = store_dir / f"competitionID={competitionID}" / f"season={season}" / f"matchID={matchID}"
+        for path in match_dir.glob("*.parquet"):
+            path.unlink()
+
+
+def write_event_store(df_events: pd.DataFrame, store_dir: Path = EVENT_STORE_FOLDER, pipeline: str = SEASON_PIPELINE,
+                      row_group_size: int = ROW_GROUP_SIZE):
+    """
+    Write transformed events into the hive-partitioned event store.
+
+    - Partitions: competitionID / season / matchID / pipeline
+    - Row groups sorted by (matchID, matchPeriod, eventSec)
+    - Matches present in df_events replace their partition of this pipeline (no duplicated rows on disk);
+      the season ETL and the tracking pipeline never overwrite each other (different coordinates)
+    - Column types follow EVENT_SCHEMA (category -> dictionary, float32 coordinates, uint8 flags)
+    """
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+
+    if df_events.empty:
+        return store_dir
+
+    df = add_partition_columns(df_events)
+    df = apply_event_schema(df)
+    df = df.sort_values(SORT_COLS, kind="stable").reset_index(drop=True)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.append_column(PIPELINE_COL, pa.array([pipeline] * len(table), pa.string()))
+
+    _remove_legacy_files(store_dir, df)
+    ds.write_dataset(
+        table,
+        store_dir,
+        format="parquet",
+        partitioning=EVENT_PARTITIONING,
+        basename_template="part-{i}.parquet",
+        existing_data_behavior="delete_matching",
+        max_rows_per_group=row_group_size,
+        min_rows_per_group=min(row_group_size, len(df)),
+        max_partitions=max(df["matchID"].nunique(), 1024),     # full load: 1 partition / trận
+    )
+    update_store_schema(store_dir, table)
+
+    print(f"Save event store: {store_dir} ({pipeline}, {df['matchID'].nunique()} match, {len(df)} row)")
+    return store_dir
+
+
+#=====READ
+def read_event_store(store_dir: Path = EVENT_STORE_FOLDER, columns=None, filters=None,
+                     pipeline: str = SEASON_PIPELINE) -> pd.DataFrame:
+    """
+    Read events of 1 pipeline from the store.
+
+    columns: column projection
+    filters: pyarrow DNF filters, e.g. [("matchID", "==", 2500045)] -> only that partition is opened
+    pipeline: SEASON_PIPELINE | TRACKING_PIPELINE (files written before the pipeline key = season)
+
+    Returned columns follow EVENT_SCHEMA (also for partitions written before the schema existed).
+    """
+    store_dir = Path(store_dir)
+    schema = read_store_schema(store_dir)
+
+    if schema is None:
+        return pd.DataFrame(columns=columns or [])
+    if PIPELINE_COL not in schema.names:
+        # store ghi trước khi có pipeline key
+        schema = schema.append(pa.field(PIPELINE_COL, pa.string()))
+
+    dataset = ds.dataset(store_dir, format="parquet", partitioning=EVENT_PARTITIONING, schema=schema)
+
+    is_pipeline = ds.field(PIPELINE_COL) == pipeline
+    if pipeline == SEASON_PIPELINE:
+        is_pipeline = is_pipeline | ds.field(PIPELINE_COL).is_null()
+    if filters:
+        is_pipeline = is_pipeline & pq.filters_to_expression(filters)
+
+    table = dataset.to_table(columns=columns, filter=is_pipeline)
+    if PIPELINE_COL in table.column_names and PIPELINE_COL not in (columns or []):
+        table = table.drop_columns([PIPELINE_COL])
+
+    return apply_event_schema(table.to_pandas())
+
+
+def read_match_events(store_dir: Path = EVENT_STORE_FOLDER, columns=None, filters=None) -> pd.DataFrame:
+    """
+    Events of 1 match with the columns of the tracking pipeline (TRACKING_EVENT_COLUMNS),
+    whichever pipeline wrote it:
+
+    - season rows (corrected coordinates), tracking-only columns (frames, Team, ...) joined by event ID
+    - no season rows: the tracking rows
+    - columns that neither pipeline wrote: NA
+    """
+    columns = columns or TRACKING_EVENT_COLUMNS
+    df_season = read_event_store(store_dir, filters=filters)
+    df_tracking = read_event_store(store_dir, filters=filters, pipeline=TRACKING_PIPELINE)
+
+    if df_season.empty:
+        df = df_tracking
+    else:
+        df = df_season
+        # cột chỉ tracking ghi (store schema là union -> bên season là cột toàn null)
+        extra_cols = [
+            c for c in df_tracking.columns
+            if c != "ID" and (c not in df.columns or df[c].isna().all())
+        ]
+        if extra_cols and "ID" in df.columns:
+            df = df.drop(columns=extra_cols, errors="ignore")
+            df = df.merge(df_tracking[["ID"] + extra_cols], on="ID", how="left")
+
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    return df.reindex(columns=columns)
@@ -0,0 +1,340 @@
+#preprocessing/kpi_cube.py
+import sys
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+## CẤU HÌNH ĐƯỜNG DẪN
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from preprocessing.event_store import compute_season, read_store_schema, update_store_schema, SCHEMA_FILE
+from supportFolder.statical_eventTracking import (
+    LEVEL_KEYS, MEASURE_COLS, ALL_KPIS, aggregate_kpi_measures, finalize_kpis
+)
+
+DATA_TRANSFORM_FOLDER = ROOT / "dataset" / "data_transforms"
+KPI_CUBE_FOLDER = DATA_TRANSFORM_FOLDER / "kpi_cube"
+
+# Grain lưu trên đĩa -> các level suy ra bằng roll-up
+CUBE_GRAINS = ["player_match", "team_match"]
+ROLLUP_SOURCE = {
+    "player_match": "player_match",
+    "player": "player_match",
+    "team_match": "team_match",
+    "team": "team_match",
+    "match": "team_match",
+}
+
+MATCH_DIMENSIONS = ["competitionID", "season"]
+
+# kpi_cube/<grain>/matchID=.../part-0.parquet -> 1 lần ghi chỉ thay partition của các trận đổi
+CUBE_PARTITIONING = ds.partitioning(pa.schema([("matchID", pa.int32())]), flavor="hive")
+
+# Tổng mùa giải cập nhật theo delta: grain tổng -> (grain nguồn, khóa)
+# player_season giữ teamID trong khóa để chọn đội của cầu thủ (nhiều event nhất) khi roll-up
+TOTAL_GRAINS = {
+    "player_season": ("player_match", ["competitionID", "season", "playerID", "teamID"]),
+    "team_season": ("team_match", ["competitionID", "season", "teamID"]),
+}
+TOTAL_SUM_COLS = MEASURE_COLS + ["nbEvents", "nbMatches"]
+# Tên / vị trí cầu thủ giữ theo từng mùa
+PLAYER_INFO_KEYS = ["competitionID", "season", "playerID"]
+
+
+#=====BUILD
+def _match_dimensions(df_events: pd.DataFrame) -> pd.DataFrame:
+    """
+    competitionID / season / homeTeamID per match (1 row per matchID)
+    """
+    df_match = df_events.groupby("matchID").agg(homeTeamID=("homeTeamID", "first"))
+
+    df_match["competitionID"] = (
+        df_events.groupby("matchID")["competitionID"].first() if "competitionID" in df_events.columns else -1
+    )
+    df_match["season"] = (
+        compute_season(df_events.groupby("matchID")["matchDate"].first()) if "matchDate" in df_events.columns else -1
+    )
+
+    return df_match
+
+
+def build_kpi_cube(df_events: pd.DataFrame) -> dict:
+    """
+    Additive KPI measures (MEASURE_COLS) at player_match and team_match grain
+
+    Return: {"player_match": DataFrame, "team_match": DataFrame}
+    """
+    need_accurate = "accurate" in df_events.columns
+    df_match = _match_dimensions(df_events)
+    cube = {}
+
+    for grain in CUBE_GRAINS:
+        keys = LEVEL_KEYS[grain]
+        df_grain = aggregate_kpi_measures(df_events, keys, need_accurate=need_accurate)
+        df_grain["nbEvents"] = df_events.groupby(keys).size()
+        df_grain = df_grain.reset_index()
+
+        dims = df_match.loc[df_grain["matchID"]].reset_index(drop=True)
+        for col in MATCH_DIMENSIONS:
+            df_grain[col] = dims[col].to_numpy()
+
+        if grain == "team_match":
+            df_grain["isHome"] = (df_grain["teamID"] == dims["homeTeamID"]).to_numpy()
+
+        cube[grain] = df_grain
+
+    return cube
+
+
+#=====WRITE / READ
+def cube_path(grain: str, cube_dir: Path = KPI_CUBE_FOLDER) -> Path:
+    """
+    Cube grain (CUBE_GRAINS): partitioned directory, season totals: 1 parquet file
+    """
+    if grain in CUBE_GRAINS:
+        return Path(cube_dir) / grain
+    return Path(cube_dir) / f"{grain}.parquet"
+
+
+def read_cube_partitions(path: Path, columns=None, filters=None) -> pd.DataFrame:
+    """
+    Read a partitioned cube grain; filters on matchID only open those partitions
+    """
+    path = Path(path)
+    schema = read_store_schema(path)
+    if schema is None:
+        return pd.DataFrame(columns=columns or [])
+
+    dataset = ds.dataset(path, format="parquet", partitioning=CUBE_PARTITIONING, schema=schema)
+    table = dataset.to_table(
+        columns=columns,
+        filter=pq.filters_to_expression(filters) if filters else None
+    )
+    return table.to_pandas()
+
+
+def _read_match_partitions(path: Path, match_ids) -> pd.DataFrame:
+    """
+    Rows of match_ids only, opened by partition path (no listing of the whole grain)
+    """
+    schema = read_store_schema(path)
+    files = [str(f) for matchID in match_ids for f in (path / f"matchID={int(matchID)}").glob("*.parquet")]
+    if schema is None or not files:
+        return pd.DataFrame()
+
+    dataset = ds.dataset(files, format="parquet", partitioning=CUBE_PARTITIONING,
+                         partition_base_dir=str(path), schema=schema)
+    return dataset.to_table().to_pandas()
+
+
+def read_kpi_cube(grain: str, cube_dir: Path = KPI_CUBE_FOLDER, columns=None, filters=None) -> pd.DataFrame:
+    path = cube_path(grain, cube_dir)
+    if not path.exists():
+        return pd.DataFrame()
+
+    if grain in CUBE_GRAINS:
+        df = read_cube_partitions(path, columns=columns, filters=filters)
+        sort_cols = [col for col in LEVEL_KEYS[grain][::-1] if col in df.columns]
+        return df.sort_values(sort_cols).reset_index(drop=True) if sort_cols else df
+
+    return pd.read_parquet(path, columns=columns, filters=filters)
+
+
+def _write_parquet(df: pd.DataFrame, path: Path):
+    # Ghi file tạm rồi đổi tên -> dashboard không đọc phải file ghi dở
+    tmp_path = path.with_suffix(".tmp")
+    df.to_parquet(tmp_path, index=False)
+    tmp_path.replace(path)
+
+
+def _write_cube_partitions(df: pd.DataFrame, path: Path, match_ids):
+    """
+    Replace the matchID partitions of match_ids (a match without rows anymore loses its partition)
+    """
+    path.mkdir(parents=True, exist_ok=True)
+    for matchID in match_ids:
+        shutil.rmtree(path / f"matchID={int(matchID)}", ignore_errors=True)
+
+    if df.empty:
+        # chỉ xoá partition -> vẫn đánh dấu store đã đổi (cache dashboard key theo mtime của file này)
+        if (path / SCHEMA_FILE).exists():
+            (path / SCHEMA_FILE).touch()
+        return
+
+    df = df.assign(matchID=df["matchID"].astype("int32"))
+    df = df.sort_values(LEVEL_KEYS[path.name][::-1]).reset_index(drop=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    ds.write_dataset(
+        table,
+        path,
+        format="parquet",
+        partitioning=CUBE_PARTITIONING,
+        basename_template="part-{i}.parquet",
+        existing_data_behavior="delete_matching",
+        max_partitions=max(df["matchID"].nunique(), 1024),     # full load: 1 partition / trận
+    )
+    update_store_schema(path, table)
+
+
+def _migrate_single_file_cube(grain: str, cube_dir: Path):
+    """
+    Former layout kpi_cube/<grain>.parquet -> partitions (once)
+    """
+    legacy_path = Path(cube_dir) / f"{grain}.parquet"
+    if not legacy_path.exists():
+        return
+
+    df_legacy = pd.read_parquet(legacy_path)
+    _write_cube_partitions(df_legacy, cube_path(grain, cube_dir), df_legacy["matchID"].unique())
+    legacy_path.unlink()
+
+
+def write_kpi_cube(df_events: pd.DataFrame, cube_dir: Path = KPI_CUBE_FOLDER) -> dict:
+    """
+    Build the cube of df_events and replace the matchID partitions of the same matches in KPI_CUBE_FOLDER.
+    Season totals are then updated with the delta (new partials - replaced partials) only:
+    the cost depends on the changed matches, not on the stored history.
+
+    Return: the cube of df_events ({"player_match": ..., "team_match": ...})
+    """
+    cube_dir = Path(cube_dir)
+    cube_dir.mkdir(parents=True, exist_ok=True)
+
+    if df_events.empty:
+        return {}
+
+    cube = build_kpi_cube(df_events)
+    match_ids = df_events["matchID"].unique().tolist()
+    replaced = {}
+
+    for grain, df_new in cube.items():
+        _migrate_single_file_cube(grain, cube_dir)
+        replaced[grain] = _read_match_partitions(cube_path(grain, cube_dir), match_ids)
+        _write_cube_partitions(df_new, cube_path(grain, cube_dir), match_ids)
+
+    for total_grain, (grain, _) in TOTAL_GRAINS.items():
+        update_kpi_totals(total_grain, cube[grain], replaced[grain], cube_dir)
+
+    print(f"Save KPI cube: {cube_dir} ({len(match_ids)} match, {len(cube['team_match'])} team-match row)")
+    return cube
+
+
+#=====SEASON TOTALS (INCREMENTAL)
+def _sum_partials(df_partials: pd.DataFrame, keys) -> pd.DataFrame:
+    df = df_partials.assign(nbMatches=1)
+    return df.groupby(keys, dropna=False)[TOTAL_SUM_COLS].sum()
+
+
+def _latest_player_info(df_info: pd.DataFrame, info_cols) -> pd.DataFrame:
+    """
+    playerName / playerPosition per player and season (PLAYER_INFO_KEYS): value of the latest matchID
+    """
+    df_info = df_info.sort_values("matchID", kind="stable")
+    df_info = df_info.drop_duplicates(PLAYER_INFO_KEYS, keep="last")
+    return df_info[PLAYER_INFO_KEYS + info_cols]
+
+
+def update_kpi_totals(total_grain: str, df_added: pd.DataFrame, df_removed: pd.DataFrame,
+                      cube_dir: Path = KPI_CUBE_FOLDER) -> pd.DataFrame:
+    """
+    totals += sum(df_added partials) - sum(df_removed partials)
+
+    Cost depends on the changed matches (+ size of the totals table), not on the event history.
+    Totals that do not exist yet are built once from the whole stored cube grain.
+    """
+    grain, keys = TOTAL_GRAINS[total_grain]
+    path = cube_path(total_grain, cube_dir)
+    info_cols = ["playerName", "playerPosition"] if "playerID" in keys else []
+
+    if not path.exists():
+        df_source = read_kpi_cube(grain, cube_dir)
+        if df_source.empty:
+            df_source = df_added
+        df_totals = _sum_partials(df_source, keys)
+        df_info = df_source[PLAYER_INFO_KEYS + ["matchID"] + info_cols] if info_cols else None
+    else:
+        df_stored = pd.read_parquet(path)
+        deltas = [df_stored.set_index(keys)[TOTAL_SUM_COLS], _sum_partials(df_added, keys)]
+        if not df_removed.empty:
+            deltas.append(-_sum_partials(df_removed, keys))
+
+        df_totals = pd.concat(deltas).groupby(level=keys, dropna=False).sum()
+        df_totals = df_totals[df_totals["nbMatches"] > 0]
+        # Tên / vị trí không trừ được -> giá trị đã lưu của mỗi mùa (matchID = -1: trước các trận mới
+        # cùng mùa), trận mới ghi đè trong mùa của nó
+        df_info = pd.concat([
+            df_stored[PLAYER_INFO_KEYS + info_cols].assign(matchID=-1),
+            df_added[PLAYER_INFO_KEYS + ["matchID"] + info_cols],
+        ]) if info_cols else None
+
+    df_totals = df_totals.reset_index()
+
+    if info_cols:
+        df_totals = df_totals.merge(_latest_player_info(df_info, info_cols), on=PLAYER_INFO_KEYS, how="left")
+
+    _write_parquet(df_totals, path)
+    return df_totals
+
+
+def read_kpi_totals(total_grain: str, cube_dir: Path = KPI_CUBE_FOLDER, competitionID: int = None, season: int = None) -> pd.DataFrame:
+    filters = []
+    if competitionID is not None:
+        filters.append(("competitionID", "==", competitionID))
+    if season is not None:
+        filters.append(("season", "==", season))
+
+    return read_kpi_cube(total_grain, cube_dir, filters=filters or None)
+
+
+#=====ROLL-UP
+def rollup_kpi_cube(df_cube: pd.DataFrame, group_col: str) -> pd.DataFrame:
+    """
+    Sum additive measures of a cube grain up to group_col (player | team | match | *_match).
+    Output has the layout of aggregate_kpi_measures -> finalize_kpis rebuilds shares / means
+    from their numerators and denominators.
+    """
+    keys = LEVEL_KEYS[group_col]
+    grouped = df_cube.groupby(keys)
+
+    df_measures = grouped[MEASURE_COLS].sum()
+
+    if "matchID" not in df_cube.columns:
+        nb_matches = grouped["nbMatches"].sum()   # bảng tổng mùa giải
+    elif keys == ["matchID"]:
+        nb_matches = 1
+    else:
+        nb_matches = grouped["matchID"].nunique()
+    df_measures.insert(0, "nbMatches", nb_matches)
+
+    if "playerID" in keys:
+        df_measures.insert(0, "playerName", grouped["playerName"].min())
+        df_measures.insert(1, "playerPosition", grouped["playerPosition"].min())
+
+        # Đội của cầu thủ: đội có nhiều event nhất (như value_counts trên event)
+        df_team = df_cube.groupby(keys + ["teamID"], sort=False)["nbEvents"].sum().rename("n").reset_index()
+        df_team = df_team.sort_values("n", ascending=False, kind="stable").drop_duplicates(keys)
+        df_measures.insert(2, "teamID", df_team.set_index(keys)["teamID"])
+
+    return df_measures
+
+
+def compute_statistics_from_cube(df_cube: pd.DataFrame, group_col: str, keep_kpis="all", drop_KPIS=None) -> pd.DataFrame:
+    """
+    compute_statistics output (same columns) from a cube grain (or season totals) instead of raw events.
+    Not available: centroid_events filter, minutePlayed / totalPasses90 (need df_formations).
+    """
+    kpis = ALL_KPIS if keep_kpis == "all" else keep_kpis
+    if drop_KPIS is not None:
+        kpis = [k for k in kpis if k not in drop_KPIS]
+
+    if ROLLUP_SOURCE.get(group_col) is None:
+        raise ValueError("Nhóm cột không tồn tại trong mô hình")
+
+    return finalize_kpis(rollup_kpi_cube(df_cube, group_col), LEVEL_KEYS[group_col], kpis)
@@ -0,0 +1,202 @@
+#preprocessing/offline_backend.py
+import sys
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+## CẤU HÌNH ĐƯỜNG DẪN
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from preprocessing.db_config import OFFLINE_DB_PATH
+
+# ===============================
+# WYSCOUT-SHAPED REFERENCE DATA
+# ===============================
+# (eventName, subEventName, tần suất tương đối)
+EVENT_TYPES = [
+    ("Pass", "Simple pass", 40), ("Pass", "High pass", 5), ("Pass", "Cross", 3),
+    ("Pass", "Smart pass", 1), ("Pass", "Launch", 2), ("Pass", "Head pass", 4), ("Pass", "Hand pass", 1),
+    ("Duel", "Ground attacking duel", 7), ("Duel", "Ground defending duel", 7),
+    ("Duel", "Air duel", 5), ("Duel", "Ground loose ball duel", 4),
+    ("Shot", "Shot", 2),
+    ("Free kick", "Throw in", 3), ("Free kick", "Corner", 1), ("Free kick", "Free Kick", 2),
+    ("Free kick", "Goal kick", 1),
+    ("Foul", "Foul", 2),
+    ("Others on the ball", "Touch", 4), ("Others on the ball", "Clearance", 2), ("Others on the ball", "Acceleration", 1),
+    ("Interruption", "Ball out of the field", 3), ("Interruption", "Whistle", 1),
+    ("Offside", "", 0.3),
+    ("Save attempt", "Save attempt", 0.5), ("Save attempt", "Reflexes", 0.5),
+    ("Goalkeeper leaving line", "Goalkeeper leaving line", 0.3),
+]
+
+TAGS = {
+    101: "Goal", 102: "Own goal", 301: "Assist", 302: "Key pass",
+    401: "Left foot", 402: "Right foot", 403: "Head/body",
+    1801: "Accurate", 1802: "Not accurate", 1901: "Counter attack",
+}
+
+ROLES = ["Goalkeeper"] + ["Defender"] * 4 + ["Midfielder"] * 4 + ["Forward"] * 2
+PERIOD_SECONDS = 2800
+
+
+def _build_reference(n_teams, rng):
+    df_eventsname = pd.DataFrame(
+        [(i + 1, name, sub) for i, (name, sub, _) in enumerate(EVENT_TYPES)],
+        columns=["subEventID", "eventName", "subEventName"]
+    )
+
+    df_teams = pd.DataFrame({
+        "teamID": np.arange(1, n_teams + 1) * 100,
+        "teamName": [f"Team {i}" for i in range(1, n_teams + 1)],
+    })
+
+    df_players = pd.DataFrame({
+        "playerID": np.arange(1, n_teams * len(ROLES) + 1),
+        "teamID": np.repeat(df_teams["teamID"].to_numpy(), len(ROLES)),
+        "pRole": ROLES * n_teams,
+        "foot": rng.choice(["right", "left", "both"], n_teams * len(ROLES), p=[0.7, 0.25, 0.05]),
+    })
+    df_players["Sname"] = "Player " + df_players["playerID"].astype(str)
+
+    df_tagsname = pd.DataFrame({"tagID": list(TAGS), "Description": list(TAGS.values())})
+
+    return df_eventsname, df_teams, df_players, df_tagsname
+
+
+def _build_match(matchID, home, away, df_players, events_per_match, first_record_id, rng):
+    """
+    Events + tags of one synthetic match (2 periods, sorted by eventSec)
+    """
+    n = events_per_match
+    weights = np.array([w for _, _, w in EVENT_TYPES], dtype=float)
+
+    period = np.repeat(["1H", "2H"], [n // 2, n - n // 2])
+    event_sec = np.concatenate([
+        np.sort(rng.uniform(0, PERIOD_SECONDS, n // 2)),
+        np.sort(rng.uniform(0, PERIOD_SECONDS, n - n // 2)),
+    ]).round(3)
+
+    # Đội kiểm soát bóng đổi theo chuỗi ngắn (possession spells)
+    spell = np.cumsum(rng.random(n) < 0.15)
+    team_id = np.where(spell % 2 == 0, home, away)
+
+    squads = {t: df_players.loc[df_players["teamID"] == t, "playerID"].to_numpy() for t in (home, away)}
+    player_id = np.where(
+        team_id == home,
+        rng.choice(squads[home], n),
+        rng.choice(squads[away], n),
+    )
+
+    sub_event_id = rng.choice(len(EVENT_TYPES), n, p=weights / weights.sum()) + 1
+
+    df_events = pd.DataFrame({
+        "eventRecordID": np.arange(first_record_id, first_record_id + n),
+        "matchID": matchID,
+        "matchPeriod": period,
+        "eventSec": event_sec,
+        "subEventID": sub_event_id,
+        "teamID": team_id,
+        "playerID": player_id,
+        "posOrigX": rng.integers(0, 101, n),
+        "posOrigY": rng.integers(0, 101, n),
+        "posDestX": rng.integers(0, 101, n),
+        "posDestY": rng.integers(0, 101, n),
+    })
+
+    # Tags
+    event_name = np.array([EVENT_TYPES[i - 1][0] for i in sub_event_id])
+    ids = df_events["eventRecordID"].to_numpy()
+
+    is_pass_duel = np.isin(event_name, ["Pass", "Duel"])
+    accurate = rng.random(n) < 0.8
+    is_shot = event_name == "Shot"
+    is_goal = is_shot & (rng.random(n) < 0.1)
+
+    tags = [
+        pd.DataFrame({"eventRecordID": ids[is_pass_duel & accurate], "tagID": 1801}),
+        pd.DataFrame({"eventRecordID": ids[is_pass_duel & ~accurate], "tagID": 1802}),
+        pd.DataFrame({"eventRecordID": ids[is_goal], "tagID": 101}),
+        pd.DataFrame({"eventRecordID": ids[is_shot], "tagID": rng.choice([401, 402, 403], is_shot.sum())}),
+        pd.DataFrame({"eventRecordID": ids[rng.random(n) < 0.01], "tagID": 1901}),
+    ]
+
+    return df_events, pd.concat(tags, ignore_index=True)
+
+
+def seed_offline_database(path: Path = OFFLINE_DB_PATH, n_matches: int = 20, n_teams: int = 10,
+                          events_per_match: int = 1600, seed: int = 42) -> Path:
+    """
+    Create a local SQLite database with the tables used by SQL_Query/*.sql, filled with
+    synthetic Wyscout-shaped data (same seed -> same database).
+
+    Use with SQL_BACKEND=sqlite (SQL_OFFLINE_DB=<path>) to run the extraction layer without SQL Server.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        path.unlink()
+
+    rng = np.random.default_rng(seed)
+    df_eventsname, df_teams, df_players, df_tagsname = _build_reference(n_teams, rng)
+
+    matches, match_teams, formations, events, event_tags = [], [], [], [], []
+    next_record_id = 1
+    match_dates = pd.Timestamp("2017-08-12") + pd.to_timedelta(np.arange(n_matches) * 3, unit="D")
+
+    for i in range(n_matches):
+        matchID = 2_500_000 + i + 1
+        home, away = rng.choice(df_teams["teamID"].to_numpy(), 2, replace=False)
+
+        matches.append({
+            "matchID": matchID, "competitionID": 364, "matchDate": match_dates[i].date().isoformat(),
+            "labelMatch": f"Team {home // 100} - Team {away // 100}", "venueName": f"Stadium {home // 100}",
+        })
+        match_teams += [
+            {"matchID": matchID, "teamID": int(home), "side": "home"},
+            {"matchID": matchID, "teamID": int(away), "side": "away"},
+        ]
+
+        df_lineup = df_players[df_players["teamID"].isin([home, away])]
+        formations.append(pd.DataFrame({
+            "matchID": matchID,
+            "teamID": df_lineup["teamID"].to_numpy(),
+            "playerID": df_lineup["playerID"].to_numpy(),
+            "lineup": 1, "substituteIn": 0, "substituteOut": 0,
+            "minuteStart": 0, "minuteEnd": 90, "minutePlayed": 90,
+        }))
+
+        df_ev, df_tg = _build_match(matchID, home, away, df_players, events_per_match, next_record_id, rng)
+        next_record_id += len(df_ev)
+        events.append(df_ev)
+        event_tags.append(df_tg)
+
+    tables = {
+        "EVENTSNAME": df_eventsname,
+        "TEAMS": df_teams,
+        "PLAYERS": df_players.drop(columns="teamID"),
+        "TAGSNAME": df_tagsname,
+        "MATCHES": pd.DataFrame(matches),
+        "MATCHTEAMS": pd.DataFrame(match_teams),
+        "FORMATIONS": pd.concat(formations, ignore_index=True),
+        "EVENTS": pd.concat(events, ignore_index=True),
+        "EVENTTAGS": pd.concat(event_tags, ignore_index=True),
+    }
+
+    with sqlite3.connect(path) as conn:
+        for name, df in tables.items():
+            df.to_sql(name, conn, index=False)
+
+        conn.execute("CREATE INDEX IX_EVENTS_matchID ON EVENTS (matchID)")
+        conn.execute("CREATE INDEX IX_EVENTTAGS_eventRecordID ON EVENTTAGS (eventRecordID)")
+        conn.execute("CREATE INDEX IX_FORMATIONS_matchID ON FORMATIONS (matchID)")
+
+    print(f"Seed offline database: {path} ({n_matches} match, {len(tables['EVENTS'])} event)")
+    return path
+
+
+if __name__ == "__main__":
+    seed_offline_database()
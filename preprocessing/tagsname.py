@@ -6,7 +6,9 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parent.parent
 sys.path.append(str(ROOT))
 
-from preprocessing.db_config import get_engine
+from sqlalchemy import text
+
+from preprocessing.db_config import get_engine, match_list_filter, match_list_params, resolve_sql_file
 
 
 SQL_FOLDER = ROOT / "SQL_Query"
@@ -15,11 +17,11 @@ DATA_EXTRACTION_FOLDER = DATASET_FOLDER / "data_extractions"
 
 SQL_filename = "tagsName.sql"
 
-def load_tags_sql(filename = SQL_filename):
+def load_tags_sql(filename = SQL_filename, engine = None):
     """
     Read query from file tagsName.sql
     """
-    path = SQL_FOLDER /filename
+    path = resolve_sql_file(SQL_FOLDER, filename, engine)
     if not path.exists():
         raise FileNotFoundError(f"Không tìm thấy file SQL: {path}")
     with open(path, 'r', encoding='utf-8') as f:
@@ -27,16 +29,21 @@ def load_tags_sql(filename = SQL_filename):
     
 
 
-def extract_tags_mapping_query(engine = None, save=False):
+def extract_tags_mapping_query(engine = None, save=False, matchIDs=None):
     """
     Extract query for mapping Description to tagID
+    matchIDs: only tags of events in these matches (incremental ETL)
     """
     if engine is None:
         engine  = get_engine()
     
-    query = load_tags_sql()
+    query = load_tags_sql(engine=engine)
+    params = None
+    if matchIDs is not None:
+        query = text(query + f"\nWHERE ET.eventRecordID IN (SELECT eventRecordID FROM EVENTS WHERE matchID {match_list_filter(engine)})")
+        params = match_list_params(matchIDs)
     print(f"-----Đang truy vấn tagsName-----")
-    df_tags = pd.read_sql(query, engine)
+    df_tags = pd.read_sql(query, engine, params=params)
 
     if save:
         save_path = DATA_EXTRACTION_FOLDER / "tagsName.parquet"
@@ -20,6 +20,8 @@ DATA_TRANSFORM_FOLDER.mkdir(parents=True, exist_ok=True)
 # Import crawler
 # ===============================
 from preprocessing.db_config import get_engine
+from preprocessing.event_store import write_event_store, TRACKING_PIPELINE
+from preprocessing.event_schema import apply_event_schema, TRACKING_EVENT_COLUMNS
 from supportFolder.cralw_eventData import crawl_matchEvent_data
 
 #--------------------------------
@@ -61,24 +63,53 @@ def map_home_away_teams(df_events_raw: pd.DataFrame):
 
 
 #--------------------------------
-def mapping_tags_to_mertrics(df_events: pd.DataFrame, df_tags: pd.DataFrame):
+# Cột flag -> tagID (thêm cột mới: chỉ cần thêm 1 dòng)
+TAG_METRIC_COLUMNS = {
+    "Goal": GOAL_TAG,
+    "ownGoal": OWN_GOAL_TAG,
+}
+
+
+def pivot_tag_flags(df_events: pd.DataFrame, df_tags: pd.DataFrame, tag_ids) -> pd.DataFrame:
+    """
+    1 cột 0/1 cho mỗi tagID, cùng thứ tự dòng với df_events (pivot + merge, không dùng apply)
+    """
+    tag_ids = list(dict.fromkeys(tag_ids))
+
+    hits = (
+        df_tags.loc[df_tags["tagID"].isin(tag_ids), ["eventRecordID", "tagID"]]
+        .drop_duplicates()
+        .assign(flag=1)
+    )
+
+    pivot = (
+        hits.pivot(index="eventRecordID", columns="tagID", values="flag")
+        .reindex(columns=tag_ids)
+        .reset_index()
+    )
+
+    flags = df_events[["eventRecordID"]].merge(pivot, on="eventRecordID", how="left")
+
+    return flags[tag_ids].fillna(0).astype(int)
+
+
+def mapping_tags_to_mertrics(df_events: pd.DataFrame, df_tags: pd.DataFrame, tag_columns: dict = TAG_METRIC_COLUMNS):
     """
     Lấy tag từ fỉle event_tags ánh xạ qua file event_tracking
+
+    tag_columns: {tên cột: tagID} -> cột 0/1
+    accurate: 0 khi chỉ có tag Not accurate, ngược lại 1
     """
-    goal_ids = set(df_tags[df_tags["tagID"] == GOAL_TAG]['eventRecordID'])
-    own_goal_ids = set(df_tags[df_tags["tagID"] == OWN_GOAL_TAG]['eventRecordID'])
-    accurate_ids = set(df_tags[df_tags["tagID"] == ACCURATE_TAG]['eventRecordID'])
-    not_accurate_ids = set(df_tags[df_tags["tagID"] == NOT_ACCURATE_TAG]['eventRecordID'])
-
-    df_events["Goal"] = df_events["eventRecordID"].apply(lambda x: 1 if x in goal_ids else 0)
-    df_events["ownGoal"] = df_events["eventRecordID"].apply(lambda x: 1 if x in own_goal_ids else 0)
-
-    def check_accurate(event_id):
-        if event_id in accurate_ids: return 1
-        if event_id in not_accurate_ids: return 0
-        return 1
-    
-    df_events ["accurate"] = df_events["eventRecordID"].apply(check_accurate)
+    flags = pivot_tag_flags(
+        df_events, df_tags,
+        list(tag_columns.values()) + [ACCURATE_TAG, NOT_ACCURATE_TAG]
+    )
+
+    for col, tag_id in tag_columns.items():
+        df_events[col] = flags[tag_id].to_numpy()
+
+    not_accurate = (flags[NOT_ACCURATE_TAG] == 1) & (flags[ACCURATE_TAG] == 0)
+    df_events["accurate"] = (~not_accurate).astype(int).to_numpy()
 
     return df_events
 
@@ -125,21 +156,14 @@ def preprocessing_events(df_events_raw: pd.DataFrame, df_tags: pd.DataFrame):
 
     df_final = df_events.rename(columns=cols_rename)
 
-    final_columns = ['ID', 'matchID', 'matchPeriod', 'eventSec', 'eventSecEnd', 
-        'startFrame', 'endFrame', 'eventName', 'subEventName', 
-        'teamID', 'Team', 'posBeforeXMeters', 'posBeforeYMeters', 
-        'posAfterXMeters', 'posAfterYMeters', 'playerID', 'playerName', 
-        'playerPosition', 'toPlayerID', 'toPlayerName', 'homeTeamID', 
-        'awayTeamID', 'accurate', 'Goal', 'ownGoal']
-
-    existing_cols = [c for c in final_columns if c in df_final.columns]
+    existing_cols = [c for c in TRACKING_EVENT_COLUMNS if c in df_final.columns]
 
-    return df_final[existing_cols]
+    return apply_event_schema(df_final[existing_cols])
 
 
 #--------------------------------
 def save_transformed_file(df_events: pd.DataFrame, df_formation: pd.DataFrame, game: int):
-    df_events.to_parquet(DATA_TRANSFORM_FOLDER/ f"events_transformed_{game}.parquet", index=False)
+    write_event_store(df_events, pipeline=TRACKING_PIPELINE)
     df_formation.to_parquet(DATA_TRANSFORM_FOLDER / f"formation_transformed_{game}.parquet", index=False)
 
 
@@ -0,0 +1,149 @@
+# supportFolder/ball_trajectory.py
+"""
+Ball trajectory model of the event-based pseudo tracking
+
+- interpolators: linear / eased (ground ball slowing down) / parabolic (lofted ball, zPos)
+- frames per event follow the event duration (startFrame / endFrame at BASE_FPS)
+- random parts (duel jitter) are hashed from eventID + seed -> same event, same frames
+"""
+import numpy as np
+import pandas as pd
+
+BASE_FPS = 25               # fps của startFrame / endFrame (preprocessing/video_tracking.py)
+TRAJECTORY_SEED = 0
+
+MAX_BALL_HEIGHT = 12.0      # mét
+HEIGHT_PER_METER = 0.2      # độ cao đỉnh = 0.2 * quãng đường (tối đa MAX_BALL_HEIGHT)
+
+HIGH_BALL_SUBEVENTS = {"High pass", "Launch", "Cross", "Goal kick"}
+GROUND_BALL_SUBEVENTS = {"Simple pass", "Smart pass", "Hand pass", "Touch", "Clearance"}
+
+
+#=====INTERPOLATORS: t in [0, 1] -> (progress along the ground, height)
+def linear(t, dist):
+    return t, np.zeros_like(t)
+
+
+def eased(t, dist):
+    # ease-out: bóng lăn chậm dần
+    return 1 - (1 - t) ** 2, np.zeros_like(t)
+
+
+def parabolic(t, dist):
+    height = np.minimum(HEIGHT_PER_METER * dist, MAX_BALL_HEIGHT)
+    return t, 4 * height * t * (1 - t)
+
+
+INTERPOLATORS = {
+    "linear": linear,
+    "eased": eased,
+    "parabolic": parabolic,
+}
+
+
+def select_interpolators(df, interpolator="auto"):
+    """
+    Interpolator name per event: parabolic for lofted passes, eased for ground passes,
+    linear otherwise (shots, duels, saves ...). Any INTERPOLATORS key forces 1 model.
+    """
+    if interpolator != "auto":
+        if interpolator not in INTERPOLATORS:
+            raise ValueError(f"Interpolator không tồn tại: {interpolator} (có: {', '.join(INTERPOLATORS)})")
+        return np.full(len(df), interpolator, dtype=object)
+
+    if "subEventName" not in df.columns:
+        return np.full(len(df), "linear", dtype=object)
+
+    sub = df["subEventName"]
+    return np.select(
+        [sub.isin(HIGH_BALL_SUBEVENTS).to_numpy(), sub.isin(GROUND_BALL_SUBEVENTS).to_numpy()],
+        ["parabolic", "eased"],
+        default="linear"
+    ).astype(object)
+
+
+#=====DETERMINISTIC RANDOM
+def hash_uniform(event_ids, stream=0, seed=TRAJECTORY_SEED):
+    """
+    Uniform [0, 1) per eventID (splitmix64 of eventID / stream / seed):
+    does not depend on row order, process or global RNG state
+    """
+    z = np.asarray(event_ids).astype(np.uint64)
+    z = z ^ (np.uint64(seed & 0xFFFFFF) << np.uint64(32)) ^ (np.uint64(stream & 0xFF) << np.uint64(56))
+
+    with np.errstate(over="ignore"):
+        z = z + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+
+    return (z >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+
+def duel_jitter(event_ids, seed=TRAJECTORY_SEED):
+    """
+    (dx, dy) in [-1, 1) meters for duel events, fixed per eventID
+    """
+    return (
+        hash_uniform(event_ids, 0, seed) * 2 - 1,
+        hash_uniform(event_ids, 1, seed) * 2 - 1,
+    )
+
+
+#=====FRAMES
+def frame_counts(df, fps=25):
+    """
+    Ball frames of a moving event: event duration (endFrame - startFrame at BASE_FPS) at fps,
+    at least 2 (start + target). Without startFrame / endFrame: fps frames per event.
+    """
+    if {"startFrame", "endFrame"} <= set(df.columns):
+        duration = (df["endFrame"] - df["startFrame"]).to_numpy(dtype=float)
+        counts = np.round(duration * fps / BASE_FPS)
+        counts = np.where(np.isnan(counts), fps, counts)
+        return np.maximum(counts, 2).astype(np.int64)
+
+    return np.full(len(df), fps, dtype=np.int64)
+
+
+def ball_trajectories(df, xt, yt, fps=25, interpolator="auto"):
+    """
+    Ball frames of all events of df (posBefore -> target xt / yt) at once
+
+    Return: counts (ball frames per event), event index per frame, xPos, yPos, zPos
+    Events with an invalid target or without movement keep 1 frame at posBefore.
+    """
+    x0 = df["posBeforeXMeters"].to_numpy(dtype=float)
+    y0 = df["posBeforeYMeters"].to_numpy(dtype=float)
+    xt = np.asarray(xt, dtype=float)
+    yt = np.asarray(yt, dtype=float)
+
+    valid_target = pd.notna(xt) & pd.notna(yt) & ~((xt == 0) & (yt == 0))
+    moving = valid_target & ~(np.isclose(x0, xt) & np.isclose(y0, yt))
+
+    counts = np.where(moving, frame_counts(df, fps), 1)
+    event_idx = np.repeat(np.arange(len(df)), counts)
+    step = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    # t: 0 -> 1 trong mỗi event (event đứng yên: t = 0)
+    t = step / np.maximum(counts - 1, 1)[event_idx]
+    dx = np.where(moving, xt - x0, 0.0)
+    dy = np.where(moving, yt - y0, 0.0)
+    dist = np.hypot(dx, dy)[event_idx]
+
+    progress = np.zeros(len(t))
+    zs = np.zeros(len(t))
+    names = select_interpolators(df, interpolator)[event_idx]
+    for name, func in INTERPOLATORS.items():
+        is_name = names == name
+        if is_name.any():
+            progress[is_name], zs[is_name] = func(t[is_name], dist[is_name])
+
+    xs = x0[event_idx] + progress * dx[event_idx]
+    ys = y0[event_idx] + progress * dy[event_idx]
+
+    # Frame cuối = đúng vị trí đích
+    is_end = moving[event_idx] & (step == counts[event_idx] - 1)
+    xs[is_end] = xt[event_idx[is_end]]
+    ys[is_end] = yt[event_idx[is_end]]
+
+    return counts, event_idx, xs, ys, zs
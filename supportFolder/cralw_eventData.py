@@ -1,7 +1,12 @@
 import pandas as pd
 import numpy as np
 import sys
+import time
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
 
 
 ROOT = Path(__file__).resolve().parent.parent
@@ -13,61 +18,195 @@ DATA_EXTRACTION_FOLDER = ROOT / "dataset" / "data_extractions"
 
 DATA_EXTRACTION_FOLDER.mkdir(parents=True, exist_ok=True)
 
-from preprocessing.db_config import get_engine
+from preprocessing.db_config import get_engine, get_pool_stats, match_list_filter, match_list_params, resolve_sql_file
+
+# (file SQL, tên file output)
+CRAWL_QUERIES = [
+    ("event_tracking.sql", "event_tracking_raw"),
+    ("event_tags.sql", "event_tags_raw"),
+    ("formation_timeline.sql", "formation_timeline_raw"),
+]
+
+MAX_WORKERS = 4
+BATCH_SIZE = 50  # số trận mỗi truy vấn
+MAX_RETRIES = 3
+RETRY_BACKOFF = 1.0  # giây, nhân đôi sau mỗi lần thử lại
 
 
 
-def load_sql_file(filename: str) -> str:
-    path = SQL_FOLDER / filename
+def load_sql_file(filename: str, engine=None) -> str:
+    path = resolve_sql_file(SQL_FOLDER, filename, engine)
     if not path.exists():
         raise FileNotFoundError(f"Không tìm thấy script file SQL: {path}")
     return path.read_text(encoding="utf-8")
 
 
 
-def inject_matchID(sql: str, matchID: int) -> str:
+def build_match_list_sql(sql: str, engine=None) -> str:
 
     """
-    Replace: DECLARE @game INT by DECLARE @game INT = matchID
+    Replace: DECLARE @game INT; ... WHERE x.matchID = @game
+    by: WHERE x.matchID IN (list bound to the :matchIDs parameter)
     """
 
-    return sql.replace(
-        "DECLARE @game INT;",
-        f"DECLARE @game INT = {matchID};"
-    )
+    return sql.replace("DECLARE @game INT;", "").replace("= @game", match_list_filter(engine))
 
 
 
-def extract_and_save(engine, sql_filename: str, matchID: int, output_name: str, saved: bool = True) -> pd.DataFrame:
-    raw_sql = load_sql_file(sql_filename)
-    sql = inject_matchID(raw_sql, matchID)
+def extract_matches(engine, sql_filename: str, matchIDs) -> pd.DataFrame:
+    """
+    1 round trip for many matches: matchIDs are bound as a parameter, not formatted into the SQL text
+    """
+    sql = build_match_list_sql(load_sql_file(sql_filename, engine), engine)
+    return pd.read_sql(text(sql), engine, params=match_list_params(matchIDs))
+
+
+
+def save_extraction(df: pd.DataFrame, output_name: str, matchID: int):
+    output_path = DATA_EXTRACTION_FOLDER / f"{output_name}_{matchID}.parquet"
+    df.to_parquet(output_path, index=False)
+
+    print(f"Đã lưu thành công file: {output_path} ({len(df)} row)")
 
-    df = pd.read_sql(sql, engine)
 
-    if saved:
-        output_path = DATA_EXTRACTION_FOLDER / f"{output_name}_{matchID}.parquet"
-        df.to_parquet(output_path, index=False)
 
-        print(f"Đã lưu thành công file: {output_path} ({len(df)} row)")
+def extract_and_save(engine, sql_filename: str, matchID: int, output_name: str, saved: bool = True) -> pd.DataFrame:
+    df = extract_matches(engine, sql_filename, [matchID])
+
+    if saved:
+        save_extraction(df, output_name, matchID)
 
     return df
 
 
 
-def crawl_matchEvent_data(matchID: int, saved: bool=True):
-    engine = get_engine()
+def extract_and_save_batch(engine, sql_filename: str, matchIDs, output_name: str, saved: bool = True) -> dict:
+    """
+    Extract many matches with one query, then split the result per match on the client
+
+    Return: {matchID: DataFrame}
+    """
+    df = extract_matches(engine, sql_filename, matchIDs)
+    groups = dict(tuple(df.groupby("matchID", sort=False)))
+
+    results = {}
+    for matchID in matchIDs:
+        df_match = groups.get(matchID, df.iloc[0:0]).reset_index(drop=True)
+
+        if saved:
+            save_extraction(df_match, output_name, matchID)
+
+        results[matchID] = df_match
+
+    return results
+
+
+
+def crawl_matchEvent_data(matchID: int, saved: bool=True, engine=None):
+    if engine is None:
+        engine = get_engine()
 
     if saved:
         print(f"\n Lấy thông tin dữ liệu cho trận đấu matchID = {matchID}")
         print("\n Thu thập thông tin từ CSDL hệ thống thành công.")
 
-    extract_and_save(engine, sql_filename="event_tracking.sql", matchID=matchID, output_name="event_tracking_raw", saved=saved)
+    for sql_filename, output_name in CRAWL_QUERIES:
+        extract_and_save(engine, sql_filename=sql_filename, matchID=matchID, output_name=output_name, saved=saved)
+
+
+
+def is_transient_error(exc: Exception) -> bool:
+    """
+    Lỗi kết nối / timeout (cả hết thời gian chờ checkout của pool) -> thử lại.
+    Lỗi cú pháp SQL, dữ liệu -> không thử lại.
+    """
+    if isinstance(exc, (OperationalError, InterfaceError, PoolTimeoutError)):
+        return True
+    return isinstance(exc, DBAPIError) and exc.connection_invalidated
+
+
+
+def extract_with_retry(engine, sql_filename: str, matchIDs, output_name: str, saved: bool = True,
+                       retries: int = MAX_RETRIES, backoff: float = RETRY_BACKOFF) -> list:
+    """
+    1 batch with retries on transient errors. Any failure is recorded in the report rows of the batch
+    (error column) instead of raised -> the other batches of the crawl still finish.
+    """
+    start = time.perf_counter()
+
+    for attempt in range(1, retries + 2):
+        try:
+            results = extract_and_save_batch(engine, sql_filename, matchIDs, output_name, saved)
+            seconds = round(time.perf_counter() - start, 3)
+            return [
+                {"matchID": matchID, "output": output_name, "rows": len(df), "attempts": attempt,
+                 "seconds": seconds, "error": None}
+                for matchID, df in results.items()
+            ]
+
+        except Exception as e:
+            if attempt > retries or not is_transient_error(e):
+                seconds = round(time.perf_counter() - start, 3)
+                error = f"{type(e).__name__}: {getattr(e, 'orig', None) or e}"
+                return [
+                    {"matchID": matchID, "output": output_name, "rows": 0, "attempts": attempt,
+                     "seconds": seconds, "error": error}
+                    for matchID in matchIDs
+                ]
+
+            time.sleep(backoff * 2 ** (attempt - 1))
+
+
+
+def crawl_matches_event_data(matchIDs, saved: bool = True, max_workers: int = MAX_WORKERS,
+                             retries: int = MAX_RETRIES, batch_size: int = BATCH_SIZE, engine=None) -> pd.DataFrame:
+    """
+    Crawl nhiều trận song song: mỗi (lô batch_size trận, file SQL) là 1 truy vấn trên thread pool,
+    tất cả dùng chung connection pool của 1 engine.
+
+    max_workers: số truy vấn chạy đồng thời (không nên vượt quá pool_size của engine)
+    retries: số lần thử lại khi gặp lỗi kết nối tạm thời
+    batch_size: số trận lấy trong 1 truy vấn (matchID bind qua tham số, kết quả tách theo trận)
+
+    Return: DataFrame báo cáo (matchID, output, rows, attempts, seconds, error)
+    """
+    if engine is None:
+        engine = get_engine()
+
+    matchIDs = [int(m) for m in matchIDs]
+    batches = [matchIDs[i:i + batch_size] for i in range(0, len(matchIDs), batch_size)]
+
+    tasks = [
+        (batch, sql_filename, output_name)
+        for batch in batches
+        for sql_filename, output_name in CRAWL_QUERIES
+    ]
+
+    reports = []
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(extract_with_retry, engine, sql_filename, batch, output_name, saved, retries)
+            for batch, sql_filename, output_name in tasks
+        ]
+
+        for future in as_completed(futures):
+            reports.extend(future.result())
+
+    df_report = pd.DataFrame(reports).sort_values(["matchID", "output"]).reset_index(drop=True)
 
-    extract_and_save(engine, sql_filename="event_tags.sql", matchID=matchID, output_name="event_tags_raw", saved=saved)
+    nb_failed = df_report["error"].notna().sum()
+    print(f"Crawl {len(matchIDs)} trận ({len(tasks)} truy vấn) trong {time.perf_counter() - start:.1f}s, lỗi: {nb_failed}")
 
-    extract_and_save(engine, sql_filename="formation_timeline.sql", matchID=matchID, output_name="formation_timeline_raw", saved=saved)
+    pool_stats = get_pool_stats(engine)
+    if "checkouts" in pool_stats:
+        print(f"Connection pool: {pool_stats['checkouts']} checkout, "
+              f"chờ TB {pool_stats['avgWaitSeconds']:.3f}s, tối đa {pool_stats['maxWaitSeconds']:.3f}s, "
+              f"timeout: {pool_stats['timeouts']}, "
+              f"mở {pool_stats['connects']} kết nối (TB {pool_stats['avgConnectSeconds']:.3f}s)")
 
-    
+    return df_report
 
 
 
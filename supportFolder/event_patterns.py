@@ -0,0 +1,301 @@
+# supportFolder/event_patterns.py
+"""
+Pattern engine over the sorted event stream (matchID, matchPeriod, eventSec)
+
+A pattern is a chain of steps separated by "->":
+
+    "Cross -> Shot[bodyPartShot=head/body]@box"
+    "Pass{3,} -> Shot[Goal=1]"
+    "Duel[accurate=1] -> .? -> Shot"
+
+Step = <name> [col=value]... @zone... <quantifier>
+    name        eventName or subEventName, alternatives with "|" ("Cross|Smart pass"),
+                "." (or empty when an attribute is given) = any event
+    [col=v]     column filter, "!=" for negation, "|" between values
+    @zone       posBefore in a zone of ZONES, "@>zone" = posAfter
+    quantifier  ? * + {m} {m,} {m,n} (unbounded repeats are capped by max_repeat)
+
+Quantifiers are expanded into a chain of slots (1 per possible repeat, optional after min);
+all start positions advance through the chain together (vectorised NFA, 1 pass per event
+of the longest possible match).
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from supportFolder.statical_eventTracking import (
+    PITCH_LENGTH, PITCH_WIDTH, sort_events_for_phases, phase_windows, phases_to_frame
+)
+
+# Zone (mét, hướng tấn công: đội thực hiện event đá về x = PITCH_LENGTH): x_min, x_max, y_min, y_max
+ZONES = {
+    "box": (PITCH_LENGTH - 16.5, PITCH_LENGTH, PITCH_WIDTH / 2 - 20.16, PITCH_WIDTH / 2 + 20.16),
+    "six": (PITCH_LENGTH - 5.5, PITCH_LENGTH, PITCH_WIDTH / 2 - 9.16, PITCH_WIDTH / 2 + 9.16),
+    "own_box": (0.0, 16.5, PITCH_WIDTH / 2 - 20.16, PITCH_WIDTH / 2 + 20.16),
+    "final_third": (PITCH_LENGTH * 2 / 3, PITCH_LENGTH, 0.0, PITCH_WIDTH),
+    "middle_third": (PITCH_LENGTH / 3, PITCH_LENGTH * 2 / 3, 0.0, PITCH_WIDTH),
+    "defensive_third": (0.0, PITCH_LENGTH / 3, 0.0, PITCH_WIDTH),
+}
+
+MAX_REPEAT = 4
+
+STEP_RE = re.compile(
+    r"^(?P<name>[^\[@?*+{]*)"
+    r"(?P<attrs>(?:\s*\[[^\]]*\])*)"
+    r"(?P<zones>(?:\s*@>?\w+)*)"
+    r"\s*(?P<quant>[?*+]|\{\d*(?:,\d*)?\})?$"
+)
+ATTR_RE = re.compile(r"^\s*(\w+)\s*(!=|=)\s*(.+?)\s*$")
+BOOL_VALUES = {"true": True, "false": False, "1": True, "0": False}
+
+
+#=====COMPILE
+def parse_quantifier(quant, max_repeat=MAX_REPEAT):
+    """
+    Quantifier -> (min, max) repeats
+    """
+    if not quant:
+        return 1, 1
+    if quant == "?":
+        return 0, 1
+    if quant == "*":
+        return 0, max_repeat
+    if quant == "+":
+        return 1, max_repeat
+
+    low, _, high = quant[1:-1].partition(",")
+    low = int(low) if low else 0
+    if "," not in quant:
+        high = low
+    else:
+        high = int(high) if high else max(low, max_repeat)
+
+    if high < low:
+        raise ValueError(f"Quantifier không hợp lệ: {quant}")
+    return low, high
+
+
+def parse_step(text, max_repeat=MAX_REPEAT):
+    match = STEP_RE.match(text.strip())
+    if match is None:
+        raise ValueError(f"Pattern step không hợp lệ: {text!r}")
+
+    name = match["name"].strip()
+    attrs = []
+    for attr in re.findall(r"\[([^\]]*)\]", match["attrs"]):
+        attr_match = ATTR_RE.match(attr)
+        if attr_match is None:
+            raise ValueError(f"Điều kiện không hợp lệ: [{attr}]")
+        col, op, values = attr_match.groups()
+        attrs.append((col, op, [v.strip() for v in values.split("|")]))
+
+    if not name and not attrs and not match["zones"]:
+        raise ValueError(f"Pattern step rỗng: {text!r}")
+
+    low, high = parse_quantifier(match["quant"], max_repeat)
+
+    return {
+        "text": text.strip(),
+        "names": None if name in ("", ".") else [n.strip() for n in name.split("|")],
+        "attrs": attrs,
+        "zones": [(after == ">", zone) for after, zone in re.findall(r"@(>?)(\w+)", match["zones"])],
+        "min": low,
+        "max": high,
+    }
+
+
+def compile_pattern(pattern, max_repeat=MAX_REPEAT):
+    """
+    "A -> B{1,2} -> C" -> list of step dicts
+    """
+    steps = [parse_step(part, max_repeat) for part in pattern.split("->")]
+
+    for step in steps:
+        for _, zone in step["zones"]:
+            if zone not in ZONES:
+                raise ValueError(f"Zone không tồn tại: {zone} (có: {', '.join(ZONES)})")
+
+    return steps
+
+
+def build_slots(steps):
+    """
+    NFA slots: (step index, optional) per possible repeat of each step
+    "A -> B{1,3}" -> [(0, False), (1, False), (1, True), (1, True)]
+    """
+    return [(i, repeat >= step["min"]) for i, step in enumerate(steps) for repeat in range(step["max"])]
+
+
+def skip_optional(active, slots):
+    # Slot tùy chọn có thể bỏ qua: trạng thái p -> p + 1 không cần event
+    for p, (_, optional) in enumerate(slots):
+        if optional:
+            active[p + 1] |= active[p]
+    return active
+
+
+#=====SCAN
+def coerce_values(column, values, step):
+    """
+    Pattern literals -> values comparable with the column (category: dtype of its categories)
+    """
+    dtype = column.cat.categories.dtype if isinstance(column.dtype, pd.CategoricalDtype) else column.dtype
+
+    try:
+        if pd.api.types.is_bool_dtype(dtype):
+            return [BOOL_VALUES[v.lower()] for v in values]
+        if pd.api.types.is_numeric_dtype(dtype):
+            return [float(BOOL_VALUES.get(v.lower(), v)) for v in values]
+    except (KeyError, ValueError):
+        raise ValueError(
+            f"Pattern step {step['text']!r}: giá trị {values} không hợp lệ cho cột {column.name} ({dtype})"
+        ) from None
+
+    return values
+
+
+def step_mask(df_sorted, step):
+    """
+    Boolean mask of the events matching 1 step (name / attributes / zones)
+    """
+    mask = np.ones(len(df_sorted), dtype=bool)
+
+    if step["names"] is not None:
+        hit = df_sorted["eventName"].isin(step["names"])
+        if "subEventName" in df_sorted.columns:
+            hit |= df_sorted["subEventName"].isin(step["names"])
+        mask &= hit.to_numpy()
+
+    for col, op, values in step["attrs"]:
+        if col not in df_sorted.columns:
+            raise ValueError(f"Cột {col} không có trong event data")
+
+        values = coerce_values(df_sorted[col], values, step)
+        hit = df_sorted[col].isin(values).to_numpy()
+        mask &= hit if op == "=" else ~hit
+
+    for after, zone in step["zones"]:
+        x_min, x_max, y_min, y_max = ZONES[zone]
+        prefix = "posAfter" if after else "posBefore"
+        x = df_sorted[f"{prefix}XMeters"].to_numpy()
+        y = df_sorted[f"{prefix}YMeters"].to_numpy()
+        mask &= (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+
+    return mask
+
+
+def scan_pattern(df_sorted, block_starts, steps, same_team=True, max_gap=None, within=None, overlap=False):
+    """
+    Matches of the compiled pattern in df_sorted (output of sort_events_for_phases)
+
+    Return: start_pos, end_pos (positions of the first / last matched event)
+    Without overlap: leftmost-longest, non-overlapping matches (like re.finditer)
+    """
+    n = len(df_sorted)
+    masks = [step_mask(df_sorted, step) for step in steps]
+
+    block_id = np.zeros(n, dtype=np.int64)
+    block_id[block_starts[1:]] = 1
+    block_id = np.cumsum(block_id)
+
+    team = df_sorted["teamID"].to_numpy()
+    secs = df_sorted["eventSec"].to_numpy()
+
+    slots = build_slots(steps)
+    n_slots = len(slots)
+
+    # active[p, i]: match bắt đầu tại origin[i] đã qua p slot
+    origin = np.arange(n)
+    active = np.zeros((n_slots + 1, n), dtype=bool)
+    active[0] = True
+    skip_optional(active, slots)
+    best_end = np.full(n, -1, dtype=np.int64)
+
+    for k in range(n_slots):
+        pos = origin + k
+        keep = active[:n_slots].any(axis=0) & (pos < n)
+        origin, pos, active = origin[keep], pos[keep], active[:, keep]
+        if not len(origin):
+            break
+
+        valid = np.ones(len(origin), dtype=bool)
+        if k:
+            valid &= block_id[pos] == block_id[origin]
+            if same_team:
+                valid &= team[pos] == team[origin]
+            if max_gap is not None:
+                valid &= (secs[pos] - secs[pos - 1]) <= max_gap
+        if within is not None:
+            valid &= (secs[pos] - secs[origin]) <= within
+
+        moved = np.zeros_like(active)
+        for p, (i, _) in enumerate(slots):
+            moved[p + 1] = active[p] & masks[i][pos] & valid
+        active = skip_optional(moved, slots)
+
+        # Match dài nhất cho mỗi vị trí bắt đầu: k tăng dần -> ghi đè
+        done = active[n_slots]
+        best_end[origin[done]] = pos[done]
+
+    start_pos = np.flatnonzero(best_end >= 0)
+    end_pos = best_end[start_pos]
+
+    if not overlap and len(start_pos):
+        keep = np.zeros(len(start_pos), dtype=bool)
+        next_free = -1
+        for i, (start, end) in enumerate(zip(start_pos, end_pos)):
+            if start > next_free:
+                keep[i] = True
+                next_free = end
+        start_pos, end_pos = start_pos[keep], end_pos[keep]
+
+    return start_pos, end_pos
+
+
+#=====API
+def pattern_matches(df_events, pattern, same_team=True, max_gap=None, within=None, overlap=False, max_repeat=MAX_REPEAT):
+    """
+    1 row per match of the pattern: matchID, matchPeriod, teamID (first event),
+    startSec / endSec, nbEvents, firstEventID / lastEventID
+    """
+    steps = compile_pattern(pattern, max_repeat)
+    df_sorted, _, block_starts = sort_events_for_phases(df_events)
+    start_pos, end_pos = scan_pattern(df_sorted, block_starts, steps, same_team, max_gap, within, overlap)
+
+    df_first = df_sorted.iloc[start_pos]
+    df_last = df_sorted.iloc[end_pos]
+
+    df_matches = pd.DataFrame({
+        "matchID": df_first["matchID"].to_numpy(),
+        "matchPeriod": df_first["matchPeriod"].to_numpy(),
+        "teamID": df_first["teamID"].to_numpy(),
+        "startSec": df_first["eventSec"].to_numpy(),
+        "endSec": df_last["eventSec"].to_numpy(),
+        "nbEvents": end_pos - start_pos + 1,
+    })
+
+    if "ID" in df_sorted.columns:
+        df_matches["firstEventID"] = df_first["ID"].to_numpy()
+        df_matches["lastEventID"] = df_last["ID"].to_numpy()
+
+    return df_matches
+
+
+def pattern_phases(df_events, pattern, preSec=6, postSec=2, same_team=True, max_gap=None, within=None,
+                   overlap=False, max_repeat=MAX_REPEAT, as_frame=False):
+    """
+    Highlight phases of the pattern: window [first eventSec - preSec, last eventSec + postSec]
+    as list of DataFrames (or 1 frame with phaseID when as_frame)
+    """
+    steps = compile_pattern(pattern, max_repeat)
+    df_sorted, _, block_starts = sort_events_for_phases(df_events)
+    start_pos, end_pos = scan_pattern(df_sorted, block_starts, steps, same_team, max_gap, within, overlap)
+
+    secs = df_sorted["eventSec"].to_numpy()
+    lo, hi = phase_windows(df_sorted, block_starts, start_pos,
+                           np.maximum(0, secs[start_pos] - preSec), secs[end_pos] + postSec)
+
+    if as_frame:
+        return phases_to_frame(df_sorted, lo, hi)
+    return [df_sorted.iloc[a:b] for a, b in zip(lo, hi)]
@@ -1,6 +1,8 @@
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from supportFolder.plot_pitch import create_soccer_Pitch
+from supportFolder.statical_eventTracking import split_tracking_frames
 
 
 # ===============================
@@ -12,6 +14,30 @@ TEAM_COLOURS = {
     "Ball": "#000000"
 }
 
+# Style tĩnh của 3 trace cố định (chỉ khai báo 1 lần, frame không lặp lại)
+ENTITY_TRACES = {
+    "PLAYER_OWNER": dict(
+        mode="markers+text",
+        marker=dict(size=16, line=dict(width=3, color="white")),
+        textposition="top center",
+        hoverinfo="skip",
+        name="Owner"
+    ),
+    "PLAYER_TARGET": dict(
+        mode="markers+text",
+        marker=dict(size=13, opacity=0.6, line=dict(width=2, color="white")),
+        textposition="top center",
+        hoverinfo="skip",
+        name="Target"
+    ),
+    "BALL": dict(
+        mode="markers",
+        marker=dict(size=8, color=TEAM_COLOURS["Ball"], line=dict(width=1, color="white")),
+        hoverinfo="skip",
+        name="Ball"
+    ),
+}
+
 
 # ===============================
 # MAIN CLASS
@@ -19,19 +45,66 @@ TEAM_COLOURS = {
 class FootballAnimator:
     """
     Event-based pseudo tracking animation (OWNER / TARGET / BALL)
+
+    3 fixed traces on top of the pitch; each frame only carries their x / y
+    (+ colour / label of the players) through trace-index updates.
+    frame_step: keep 1 frame out of frame_step (same playback speed).
     """
 
-    def __init__(self, event_data: pd.DataFrame, speed: float = 1.0):
+    def __init__(self, event_data: pd.DataFrame, speed: float = 1.0, frame_step: int = 1):
         self.df = event_data.copy()
         self.speed = speed
 
+        if frame_step < 1:
+            raise ValueError("frame_step phải >= 1")
+        self.frame_step = int(frame_step)
+
         required_cols = {"frame", "xPos", "yPos", "team", "entityType"}
         missing = required_cols - set(self.df.columns)
         if missing:
             raise ValueError(f"Missing columns: {missing}")
 
-        self.df.sort_values("frame", inplace=True)
-        self.df.reset_index(drop=True, inplace=True)
+        if "playerName" not in self.df.columns:
+            self.df["playerName"] = ""
+
+        self.frames, self.groups = split_tracking_frames(self.df, extra_columns=["playerName"])
+
+    # ===============================
+    # FRAME DATA
+    # ===============================
+    def _kept_frames(self):
+        """
+        Indices of the frames kept by frame_step (last frame always kept)
+        """
+        kept = np.arange(0, len(self.frames), self.frame_step)
+        if len(self.frames) and kept[-1] != len(self.frames) - 1:
+            kept = np.append(kept, len(self.frames) - 1)
+        return kept
+
+    def _frame_traces(self, frame_idx, full=False):
+        """
+        Owner / target / ball updates of 1 frame (full=True: with the static style)
+        """
+        traces = []
+
+        for entity_type, style in ENTITY_TRACES.items():
+            group = self.groups[entity_type]
+            start, end = group["bounds"][frame_idx], group["bounds"][frame_idx + 1]
+            xy = np.round(group["xy"][start:end], 2)
+
+            # List ngắn hơn typed array (bdata) khi chỉ có 1-2 điểm
+            trace = dict(x=xy[:, 0].tolist(), y=xy[:, 1].tolist())
+            if entity_type != "BALL" and end > start:
+                colours = [TEAM_COLOURS.get(team, "gray") for team in group["team"][start:end]]
+                trace["marker"] = dict(color=colours[0] if len(set(colours)) == 1 else colours)
+                trace["text"] = [name if isinstance(name, str) else "" for name in group["playerName"][start:end]]
+
+            if full:
+                trace = {**style, **trace, "marker": {**style["marker"], **trace.get("marker", {})}}
+
+            traces.append(go.Scatter(**trace))
+
+        return traces
 
     # ===============================
     # BUILD ANIMATION
@@ -40,88 +113,30 @@ class FootballAnimator:
         pitch = create_soccer_Pitch(theme="classic")
         fig = pitch.fig
 
+        kept = self._kept_frames()
+
+        # 3 trace cố định nằm sau các trace của sân
+        n_pitch = len(fig.data)
+        trace_idx = list(range(n_pitch, n_pitch + len(ENTITY_TRACES)))
+
+        if len(kept):
+            fig.add_traces(self._frame_traces(kept[0], full=True))
+
         frames = []
         slider_steps = []
 
-        for frame_id, fdf in self.df.groupby("frame"):
-            traces = []
-
-            # ==========================
-            # PLAYER OWNER
-            # ==========================
-            owners = fdf[fdf["entityType"] == "PLAYER_OWNER"]
-
-            for _, row in owners.iterrows():
-                traces.append(go.Scatter(
-                    x=[row["xPos"]],
-                    y=[row["yPos"]],
-                    mode="markers+text",
-                    marker=dict(
-                        size=16,
-                        color=TEAM_COLOURS.get(row["team"], "gray"),
-                        line=dict(width=3, color="white")
-                    ),
-                    text=[row.get("playerName", "")],
-                    textposition="top center",
-                    hoverinfo="skip",
-                    name="Owner"
-                ))
-
-            # ==========================
-            # PLAYER TARGET
-            # ==========================
-            targets = fdf[fdf["entityType"] == "PLAYER_TARGET"]
-
-            for _, row in targets.iterrows():
-                traces.append(go.Scatter(
-                    x=[row["xPos"]],
-                    y=[row["yPos"]],
-                    mode="markers+text",
-                    marker=dict(
-                        size=13,
-                        color=TEAM_COLOURS.get(row["team"], "gray"),
-                        opacity=0.6,
-                        line=dict(width=2, color="white")
-                    ),
-                    text=[row.get("playerName", "")],
-                    textposition="top center",
-                    hoverinfo="skip",
-                    name="Target"
-                ))
-
-            # ==========================
-            # BALL (TOP LAYER)
-            # ==========================
-            balls = fdf[fdf["entityType"] == "BALL"]
-
-            for _, row in balls.iterrows():
-                traces.append(go.Scatter(
-                    x=[row["xPos"]],
-                    y=[row["yPos"]],
-                    mode="markers",
-                    marker=dict(
-                        size=8,
-                        color=TEAM_COLOURS["Ball"],
-                        line=dict(width=1, color="white")
-                    ),
-                    hoverinfo="skip",
-                    name="Ball"
-                ))
-
-            frames.append(go.Frame(data=traces, name=str(frame_id)))
+        for frame_idx in kept:
+            frame_id = str(self.frames[frame_idx])
+            frames.append(go.Frame(data=self._frame_traces(frame_idx), traces=trace_idx, name=frame_id))
 
             slider_steps.append({
-                "args": [[str(frame_id)], {"mode": "immediate"}],
-                "label": str(frame_id),
+                "args": [[frame_id], {"mode": "immediate"}],
+                "label": frame_id,
                 "method": "animate"
             })
 
         fig.frames = frames
 
-        # Initial frame
-        if frames:
-            fig.add_traces(frames[0].data)
-
         fig.update_layout(
             updatemenus=[{
                 "type": "buttons",
@@ -133,7 +148,7 @@ class FootballAnimator:
                         "label": "▶ Play",
                         "method": "animate",
                         "args": [None, {
-                            "frame": {"duration": int(40 / self.speed)},
+                            "frame": {"duration": int(40 * self.frame_step / self.speed)},
                             "fromcurrent": True
                         }]
                     },
@@ -3,7 +3,29 @@ import numpy as np
 import pandas as pd
 
 from supportFolder.statical_eventTracking import compute_statistics
-from Dashboard.data_access.events import load_event_data_kpis
+from preprocessing.kpi_cube import compute_statistics_from_cube
+from Dashboard.data_access.events import load_event_data_kpis, load_kpi_cube
+
+
+OVERVIEW_KPIS = [
+    "totalGoals",
+    "totalShots",
+    "totalPasses",
+    "shareAccuratePasses",
+    "meanPassLength",
+    "totalDuels",
+]
+
+
+def kpi_row_to_dict(row: pd.Series) -> dict:
+    return {
+        "shot_kpi": int(row["totalShots"]),
+        "passes_kpi": int(row["totalPasses"]),
+        "accuracy_kpi": float(row["shareAccuratePasses"]),  # đã là %
+        "mean_pass_length_kpi": float(row["meanPassLength"]),
+        "duels_kpi": int(row["totalDuels"]),
+        "goals_kpi": int(row["totalGoals"]),
+    }
 
 
 def build_overview_team_kpis(df_events: pd.DataFrame, team_id: int) -> dict:
@@ -17,14 +39,7 @@ def build_overview_team_kpis(df_events: pd.DataFrame, team_id: int) -> dict:
     df_stats = compute_statistics(
         df_events,
         group_col="team",
-        keep_kpis=[
-            "totalGoals",
-            "totalShots",
-            "totalPasses",
-            "shareAccuratePasses",
-            "meanPassLength",
-            "totalDuels",
-        ]
+        keep_kpis=OVERVIEW_KPIS
     )
 
     if df_stats.empty:
@@ -34,13 +49,31 @@ def build_overview_team_kpis(df_events: pd.DataFrame, team_id: int) -> dict:
     if row.empty:
         return {}
 
-    row = row.iloc[0]
+    return kpi_row_to_dict(row.iloc[0])
 
-    return {
-        "shot_kpi": int(row["totalShots"]),
-        "passes_kpi": int(row["totalPasses"]),
-        "accuracy_kpi": float(row["shareAccuratePasses"]),  # đã là %
-        "mean_pass_length_kpi": float(row["meanPassLength"]),
-        "duels_kpi": int(row["totalDuels"]),
-        "goals_kpi": int(row["totalGoals"]),
-    }
+
+def load_overview_team_kpis(match_id: int, team_side: str) -> dict:
+    """
+    KPI of the home / away team of 1 match: key lookup in the KPI cube (team_match),
+    fallback to aggregating raw events when the match is not in the cube
+    """
+    df_cube = load_kpi_cube("team_match", filters=[("matchID", "==", match_id)])
+
+    if not df_cube.empty:
+        df_side = df_cube[df_cube["isHome"] == (team_side == "home")]
+        if not df_side.empty:
+            df_stats = compute_statistics_from_cube(df_side, "team_match", keep_kpis=OVERVIEW_KPIS)
+            return kpi_row_to_dict(df_stats.iloc[0])
+
+    df_events = load_event_data_kpis(match_id)
+    if df_events.empty:
+        return {}
+
+    # 🔑 UI chỉ dùng để chọn teamID
+    team_id = (
+        df_events["homeTeamID"].iloc[0]
+        if team_side == "home"
+        else df_events["awayTeamID"].iloc[0]
+    )
+
+    return build_overview_team_kpis(df_events, team_id)
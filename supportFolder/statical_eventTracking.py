@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+from supportFolder.ball_trajectory import TRAJECTORY_SEED, duel_jitter, ball_trajectories
+
 def compute_length(df):
     dx = df["posAfterXMeters"] - df["posBeforeXMeters"]
     dy = df["posAfterYMeters"] - df["posBeforeYMeters"]
@@ -75,131 +77,229 @@ def compute_minutePlayed(df_events, group_cols, df_formations):
     ).reset_index()
 
 
-def compute_statistics(df_events, group_col, keep_kpis="all", drop_KPIS = None, centroid_events=None, df_formations=None):
+#==========================
+# KPI ENGINE: mọi KPI từ 1 lần groupby trên các cột mask
+LEVEL_KEYS = {
+    "player": ["playerID"],
+    "team": ["teamID"],
+    "match": ["matchID"],
+    "player_match": ["playerID", "matchID"],
+    "team_match": ["teamID", "matchID"],
+}
 
-    # Khởi tạo danh sách KPI
-    all_kpis = ["totalPasses", "totalAccuratePasses", "shareAccuratePasses", "meanPassLength", 
-                "totalShots", "totalGoals", "totalDuels", "centroid", "minutePlayed", "totalPasses90"]
-    
-    kpis = all_kpis if keep_kpis == "all" else keep_kpis
-    
-    if drop_KPIS is not None:
-        kpis = [k for k in kpis if k not in drop_KPIS]
+ALL_KPIS = ["totalPasses", "totalAccuratePasses", "shareAccuratePasses", "meanPassLength",
+            "totalShots", "totalGoals", "totalDuels", "centroid", "minutePlayed", "totalPasses90"]
 
-    
-    need_passes = ("totalPasses" in kpis or "shareAccuratePasses" in kpis or "totalPasses90" in kpis)
+# Measures cộng dồn được (sum) -> KPI trung bình / tỉ lệ = tử số / mẫu số
+MEASURE_COLS = ["totalPasses", "totalAccuratePasses", "passLengthSum", "passLengthCount", "totalShots", "totalGoals",
+                "totalOwnGoals", "totalDuels", "centroidXSum", "centroidYSum", "centroidCount"]
 
-    need_accurate = ("totalAccuratePasses" in kpis or "shareAccuratePasses" in kpis)
 
-    # Thiết lập bảng kết quả ban đầu dựa trên group_col
-    if group_col == "player":
-        target_col = "playerID"
-        df_agg = (df_events.groupby(target_col).agg(
-            playerName=("playerName", "min"),
-            playerPosition=("playerPosition", "min"),
-            teamID=("teamID", lambda x: x.value_counts().index[0]),
-            nbMatches=("matchID", "nunique")
-        ).reset_index())
-        df_agg = df_agg[df_agg[target_col] != 0]
-
-    elif group_col == "team":
-        target_col = "teamID"
-        df_agg = (df_events.groupby(target_col).agg(nbMatches=("matchID", "nunique")).reset_index())
-
-    elif group_col == "match":
-        target_col = "matchID"
-        df_agg = (df_events.groupby(target_col).agg(nbMatches=("matchID", "nunique")).reset_index())
-
-    elif group_col == "player_match":
-        target_col = ["playerID", "matchID"]
-        df_agg = (df_events.groupby(target_col).agg(
-            playerName=("playerName", "min"),
-            playerPosition=("playerPosition", "min"),
-            teamID=("teamID", lambda x: x.value_counts().index[0]),
-            nbMatches=("matchID", "nunique")
-        ).reset_index())
-        df_agg = df_agg[df_agg["playerID"] != 0]
-
-    elif group_col == "team_match":
-        target_col=["teamID", "matchID"]
-        df_agg = (df_events.groupby(target_col).agg(nbMatches=("matchID", "nunique")).reset_index())
+def is_player_level(keys):
+    return "playerID" in keys
 
+
+def _flag(df_events, *cols):
+    """
+    0/1 array of the first existing flag column (Own goal / ownGoal naming differs between pipelines)
+    """
+    for col in cols:
+        if col in df_events.columns:
+            return df_events[col].fillna(0).to_numpy() == 1
+    return np.zeros(len(df_events), dtype=bool)
+
+
+def build_kpi_columns(df_events, centroid_events=None, need_accurate=True):
+    """
+    Per-event columns whose group sums give every KPI measure
+    """
+    # So sánh trên mã số nguyên của eventName (1 lần factorize thay vì so sánh chuỗi từng KPI)
+    name_codes, names = pd.factorize(df_events["eventName"])
+    lookup = {name: code for code, name in enumerate(names)}
+    is_event = lambda name: name_codes == lookup.get(name, -2)
+
+    is_pass = is_event("Pass")
+
+    dx = df_events["posAfterXMeters"].to_numpy(np.float64) - df_events["posBeforeXMeters"].to_numpy(np.float64)
+    dy = df_events["posAfterYMeters"].to_numpy(np.float64) - df_events["posBeforeYMeters"].to_numpy(np.float64)
+
+    if centroid_events is not None:
+        in_centroid = np.isin(name_codes, [lookup[name] for name in centroid_events if name in lookup])
     else:
-        raise ValueError("Nhóm cột không tồn tại trong mô hình")
-    
+        in_centroid = np.ones(len(df_events), dtype=bool)
+
+    pos_x = df_events["posBeforeXMeters"].to_numpy(np.float64)
+    pos_y = df_events["posBeforeYMeters"].to_numpy(np.float64)
+    is_shot = is_event("Shot")
+
+    columns = {
+        "totalPasses": is_pass.astype(np.int64),
+        "totalAccuratePasses": (is_pass & (df_events["accurate"].to_numpy() == 1)).astype(np.int64) if need_accurate
+                               else np.zeros(len(df_events), dtype=np.int64),
+        "passLengthSum": np.where(is_pass, np.sqrt(dx ** 2 + dy ** 2), np.nan),
+        "totalShots": is_shot.astype(np.int64),
+        "totalGoals": (is_shot & _flag(df_events, "Goal")).astype(np.int64),
+        "totalDuels": is_event("Duel").astype(np.int64),
+        "centroidXSum": np.where(in_centroid, pos_x, np.nan),
+        "centroidYSum": np.where(in_centroid, pos_y, np.nan),
+    }
+    columns["passLengthCount"] = (~np.isnan(columns["passLengthSum"])).astype(np.int64)
+    columns["centroidCount"] = (~np.isnan(columns["centroidXSum"])).astype(np.int64)
+
+    return pd.DataFrame(columns, index=df_events.index)
+
+
+def compute_group_min(df_events, keys, col):
+    """
+    groupby(keys)[col].min() computed on sorted factorize codes (faster than min over strings)
+    """
+    codes, uniques = pd.factorize(df_events[col], sort=True)
+    missing = len(uniques)
 
-    # Tính toán và Merge từng chỉ số
-    if need_passes:
-        df_var = compute_totalPasses(df_events, target_col) 
-        df_agg = pd.merge(df_agg, df_var, how="left").fillna({"totalPasses": 0})
+    df_codes = df_events[keys].copy()
+    df_codes["code"] = np.where(codes < 0, missing, codes)
+    group_min = df_codes.groupby(keys)["code"].min()
 
+    labels = uniques.take(np.where(group_min == missing, -1, group_min), allow_fill=True)
+    return pd.Series(labels, index=group_min.index, name=col)
 
-    if need_accurate:
-        df_var = compute_totalAccuratePass(df_events, target_col)
-        df_agg = pd.merge(df_agg, df_var, how="left").fillna({"totalAccuratePasses": 0})
+
+def compute_team_mode(df_events, keys):
+    """
+    Most frequent teamID per group (ties -> first seen), same as value_counts().index[0]
+    """
+    counts = df_events.groupby(keys + ["teamID"], sort=False).size().rename("n").reset_index()
+    counts = counts.sort_values("n", ascending=False, kind="stable").drop_duplicates(keys)
+    return counts.set_index(keys)["teamID"]
+
+
+def compute_own_goals_for(df_events, keys):
+    """
+    Own goals credited to the opponent (team / match levels)
+    """
+    is_own_goal = _flag(df_events, "ownGoal", "Own goal")
+    if not is_own_goal.any():
+        return None
+
+    df_og = df_events.loc[is_own_goal, ["teamID", "homeTeamID", "awayTeamID", "matchID"]].copy()
+    df_og["teamID"] = np.where(df_og["teamID"] == df_og["homeTeamID"], df_og["awayTeamID"], df_og["homeTeamID"])
+
+    return df_og.groupby(keys).size()
+
+
+def aggregate_kpi_measures(df_events, keys, centroid_events=None, need_accurate=True):
+    """
+    Additive measures (MEASURE_COLS) + nbMatches (+ player info) per group, one groupby pass
+    """
+    df_kpi = build_kpi_columns(df_events, centroid_events, need_accurate)
+    measure_cols = list(df_kpi.columns)
+    for col in dict.fromkeys(keys + ["matchID"]):
+        df_kpi[col] = df_events[col].to_numpy()
+
+    # NaN (không phải pass / ngoài centroid_events) bị bỏ qua khi sum, mẫu số là các cột *Count
+    grouped = df_kpi.groupby(keys)
+    df_measures = grouped[measure_cols].sum()
+    df_measures["nbMatches"] = grouped["matchID"].nunique() if keys != ["matchID"] else 1
+
+    if is_player_level(keys):
+        df_info = pd.concat([compute_group_min(df_events, keys, col) for col in ["playerName", "playerPosition"]], axis=1)
+        df_info["teamID"] = compute_team_mode(df_events, keys)
+        df_measures = df_info.join(df_measures)
+        df_measures = df_measures[df_measures.index.get_level_values("playerID") != 0]
+
+        df_measures["totalOwnGoals"] = 0
+    else:
+        own_goals = compute_own_goals_for(df_events, keys)
+        df_measures["totalOwnGoals"] = 0 if own_goals is None else own_goals.reindex(df_measures.index, fill_value=0)
+
+    info_cols = ["playerName", "playerPosition", "teamID"] if is_player_level(keys) else []
+    return df_measures[info_cols + ["nbMatches"] + MEASURE_COLS]
 
 
+def finalize_kpis(df_measures, keys, kpis=ALL_KPIS, df_formations=None, match_ids=None):
+    """
+    Build compute_statistics output (same columns / order) from additive measures
+    """
+    need_passes = ("totalPasses" in kpis or "shareAccuratePasses" in kpis or "totalPasses90" in kpis)
+    need_accurate = ("totalAccuratePasses" in kpis or "shareAccuratePasses" in kpis)
+
+    info_cols = ["playerName", "playerPosition", "teamID"] if is_player_level(keys) else []
+    df_agg = df_measures[info_cols + ["nbMatches"]].reset_index()
+    m = df_measures.reset_index(drop=True)
+
+    if need_passes:
+        df_agg["totalPasses"] = m["totalPasses"]
+
+    if need_accurate:
+        df_agg["totalAccuratePasses"] = m["totalAccuratePasses"]
+
     if "shareAccuratePasses" in kpis:
         df_agg["shareAccuratePasses"] = np.where(
-            df_agg["totalPasses"] > 0,
-            np.round(df_agg["totalAccuratePasses"] / df_agg["totalPasses"] * 100, 2),0
+            m["totalPasses"] > 0,
+            np.round(m["totalAccuratePasses"] / m["totalPasses"] * 100, 2), 0
         )
 
         if "totalPasses" not in kpis:
             df_agg.drop(columns="totalPasses", inplace=True)
         if "totalAccuratePasses" not in kpis:
             df_agg.drop(columns="totalAccuratePasses", inplace=True)
-    
 
     if "meanPassLength" in kpis:
-        df_var = compute_meanPassLength(df_events, target_col)
-        df_agg = pd.merge(df_agg, df_var, how="left")
-
+        df_agg["meanPassLength"] = m["passLengthSum"] / m["passLengthCount"].where(m["passLengthCount"] > 0)
 
     if "totalShots" in kpis:
-        df_var = compute_totalShot(df_events, target_col)
-        df_agg = pd.merge(df_agg, df_var, how="left").fillna({"totalShots": 0})
+        df_agg["totalShots"] = m["totalShots"]
 
-    
     if "totalGoals" in kpis:
-        df_var = compute_totalGoals(df_events, target_col)
-        df_agg = pd.merge(df_agg, df_var, how="left").fillna({"totalGoals": 0})
-
-        is_player_level = (
-            target_col == "playerID" or
-            (isinstance(target_col, list) and "playerID" in target_col)
-        )
-
         # Cộng thêm bàn phản lưới nếu thống kê theo Team/Match
-        if not is_player_level:
-            df_og = compute_own_goals(df_events, target_col)
-            df_agg = pd.merge(df_agg, df_og, how="left").fillna({"totalOwnGoals": 0})
-            df_agg["totalGoals"] += df_agg["totalOwnGoals"]
-            df_agg.drop(columns="totalOwnGoals", inplace=True)
-
+        df_agg["totalGoals"] = m["totalGoals"] + m["totalOwnGoals"]
 
     if "totalDuels" in kpis:
-        df_var = compute_totalDuels(df_events, target_col)
-        df_agg = pd.merge(df_agg, df_var, how="left").fillna({"totalDuels": 0})
-
-    
-    if ("minutePlayed" in kpis and df_formations is not None and (
-        target_col=="playerID" or (isinstance(target_col, list) and "playerID" in target_col))):
-        df_var = compute_minutePlayed(df_events, target_col, df_formations)
-        df_agg = pd.merge(df_agg, df_var, how="left")
+        df_agg["totalDuels"] = m["totalDuels"]
+
+    if "minutePlayed" in kpis and df_formations is not None and is_player_level(keys):
+        df_formate = df_formations if match_ids is None else df_formations[df_formations["matchID"].isin(match_ids)]
+        df_var = df_formate.groupby(keys).agg(
+            lineup = ("lineup", "sum"),
+            substituteIn = ("substituteIn", "sum"),
+            substituteOut = ("substituteOut", "sum"),
+            minutePlayed = ("minutePlayed", "sum")
+        ).reset_index()
+        df_agg = pd.merge(df_agg, df_var, how="left", on=keys)
 
     if "totalPasses90" in kpis and "minutePlayed" in df_agg.columns:
         df_agg["totalPasses90"] = (
             df_agg["totalPasses"] / df_agg["minutePlayed"] * 90).replace([np.inf, -np.inf], 0)
-        
-    
-    if "centroid" in kpis:
-        df_var = compute_centroids(df_events, target_col, centroid_events if centroid_events is not None else None)
-        df_agg = pd.merge(df_agg, df_var, how="left")
 
+    if "centroid" in kpis:
+        count = m["centroidCount"].where(m["centroidCount"] > 0)
+        df_agg["centroidX"] = (m["centroidXSum"] / count).to_numpy()
+        df_agg["centroidY"] = (m["centroidYSum"] / count).to_numpy()
 
     return df_agg
 
+
+def compute_statistics(df_events, group_col, keep_kpis="all", drop_KPIS = None, centroid_events=None, df_formations=None):
+    """
+    KPI per group_col: player | team | match | player_match | team_match
+
+    Every KPI comes from one groupby over per-event mask columns (build_kpi_columns);
+    output columns and values are the same as the former per-KPI filter + groupby + merge.
+    """
+    kpis = ALL_KPIS if keep_kpis == "all" else keep_kpis
+
+    if drop_KPIS is not None:
+        kpis = [k for k in kpis if k not in drop_KPIS]
+
+    if group_col not in LEVEL_KEYS:
+        raise ValueError("Nhóm cột không tồn tại trong mô hình")
+    keys = LEVEL_KEYS[group_col]
+
+    need_accurate = ("totalAccuratePasses" in kpis or "shareAccuratePasses" in kpis)
+    df_measures = aggregate_kpi_measures(df_events, keys, centroid_events, need_accurate)
+
+    return finalize_kpis(df_measures, keys, kpis, df_formations, match_ids=df_events["matchID"].unique())
+
 def number_pass_accurate(df_events, team_id):
     df_team = df_events[df_events["teamID"] == team_id].copy()
     df_team.sort_values(["matchID", "matchPeriod", "eventSec"], inplace=True)
@@ -269,7 +369,7 @@ def get_attacking_goal(row):
         return (0.0, PITCH_WIDTH/2)
 
 
-def infer_ball_target(row):
+def infer_ball_target(row, seed=TRAJECTORY_SEED):
     x0, y0 = row["posBeforeXMeters"], row["posBeforeYMeters"]
     x1, y1 = row.get("posAfterXMeters"), row.get("posAfterYMeters")
 
@@ -310,11 +410,10 @@ def infer_ball_target(row):
         return x0, y0
     
 
-    # DUEL
+    # DUEL: jitter cố định theo eventID (xem ball_trajectory.duel_jitter)
     if event == "Duel" or sub in DUEL_SUBEVENTS:
-        return (
-            x0 + np.random.uniform(-1, 1),
-            y0 + np.random.uniform(-1, 1))
+        dx, dy = duel_jitter([row.get("ID", 0)], seed)
+        return float(x0) + dx[0], float(y0) + dy[0]
 
 
     # FOUL / INTERRUPTION
@@ -324,24 +423,18 @@ def infer_ball_target(row):
     return x0, y0
 
 
-def event_to_ball_frames(row, fps=25):
+def event_to_ball_frames(row, fps=25, interpolator="auto", seed=TRAJECTORY_SEED):
+    """
+    Ball frames of 1 event (trajectory model of supportFolder/ball_trajectory.py)
+    """
     x0, y0 = row["posBeforeXMeters"], row["posBeforeYMeters"]
     if not valid_pos(x0, y0):
         return []
 
-    xt, yt = infer_ball_target(row)
-
-
-    if not valid_pos(xt, yt):
-        return [{"xPos": x0, "yPos": y0}]
-    
-    if np.isclose([x0, y0], [xt, yt]).all():
-        return [{"xPos":x0, "yPos": y0}]
-    
-    xs = np.linspace(x0, xt, fps)
-    ys = np.linspace(y0, yt, fps)
+    xt, yt = infer_ball_target(row, seed)
+    _, _, xs, ys, zs = ball_trajectories(pd.DataFrame([row]), [xt], [yt], fps, interpolator)
 
-    return [{"xPos": x, "yPos": y} for x, y in zip(xs, ys)]
+    return [{"xPos": x, "yPos": y, "zPos": z} for x, y, z in zip(xs, ys, zs)]
 
 
 def infer_target_player(row, next_row):
@@ -386,17 +479,89 @@ def mean_position_player(df_events):
     )
 
 
-def build_event_tracking(df_events: pd.DataFrame, event_ids, fps: int = 25):
+#=====PSEUDO TRACKING (VECTORISED)
+def infer_ball_targets(df, seed=TRAJECTORY_SEED):
+    """
+    infer_ball_target for every row of df at once -> (xt, yt) arrays
+    Duel jitter is hashed from eventID (same values as infer_ball_target)
+    """
+    n = len(df)
+    x0 = df["posBeforeXMeters"].to_numpy(dtype=float)
+    y0 = df["posBeforeYMeters"].to_numpy(dtype=float)
+    x1 = df["posAfterXMeters"].to_numpy(dtype=float) if "posAfterXMeters" in df.columns else np.full(n, np.nan)
+    y1 = df["posAfterYMeters"].to_numpy(dtype=float) if "posAfterYMeters" in df.columns else np.full(n, np.nan)
+
+    event = df["eventName"]
+    sub = df["subEventName"] if "subEventName" in df.columns else pd.Series("", index=df.index)
+    is_goal = (df["Goal"] == 1).to_numpy() if "Goal" in df.columns else np.zeros(n, dtype=bool)
+
+    is_shot = (event == "Shot").to_numpy()
+    is_pass = ((event == "Pass") | sub.isin(PASS_SUBEVENTS | {"Clearance", "Touch"})).to_numpy()
+    is_save = (event == "Save attempt").to_numpy()
+    is_duel = ((event == "Duel") | sub.isin(DUEL_SUBEVENTS)).to_numpy()
+
+    # Nhánh đầu tiên khớp thắng (như chuỗi if trong infer_ball_target)
+    is_pass = is_pass & ~is_shot
+    is_save = is_save & ~(is_shot | is_pass)
+    is_duel = is_duel & ~(is_shot | is_pass | is_save)
+
+    valid_after = pd.notna(x1) & pd.notna(y1) & ~((x1 == 0) & (y1 == 0))
+    goal_x = np.where(x0 > PITCH_LENGTH / 2, PITCH_LENGTH, 0.0)
+
+    xt = x0.copy()
+    yt = y0.copy()
+
+    shot_goal = is_shot & is_goal
+    xt[shot_goal] = goal_x[shot_goal]
+    yt[shot_goal] = PITCH_WIDTH / 2
+
+    to_after = (is_pass | is_save) & valid_after
+    xt[to_after] = x1[to_after]
+    yt[to_after] = y1[to_after]
+
+    save_goal = is_save & ~valid_after
+    xt[save_goal] = np.where(goal_x[save_goal] == PITCH_LENGTH, PITCH_LENGTH - 2, 2.0)
+    yt[save_goal] = PITCH_WIDTH / 2
+
+    dx, dy = duel_jitter(df["ID"].to_numpy()[is_duel], seed)
+    xt[is_duel] = x0[is_duel] + dx
+    yt[is_duel] = y0[is_duel] + dy
+
+    return xt, yt
+
+
+def infer_target_players(df):
+    """
+    infer_target_player for every row (next row of df) -> boolean mask of rows with a target
+    """
+    same_team = np.zeros(len(df), dtype=bool)
+    if len(df) < 2:
+        return same_team
+
+    team = df["teamID"].to_numpy()
+    secs = df["eventSec"].to_numpy()
+    x_next = df["posBeforeXMeters"].to_numpy()[1:]
+    y_next = df["posBeforeYMeters"].to_numpy()[1:]
+
+    same_team[:-1] = (
+        (team[1:] == team[:-1])
+        & (secs[1:] - secs[:-1] <= 3)
+        & pd.notna(x_next) & pd.notna(y_next) & ~((x_next == 0) & (y_next == 0))
+    )
+    return same_team
+
+
+def build_event_tracking(df_events: pd.DataFrame, event_ids, fps: int = 25, interpolator="auto", seed=TRAJECTORY_SEED):
     """
     Event-based pseudo tracking
     - PLAYER_OWNER  : event owner
     - PLAYER_TARGET : receiver / shooter
-    - BALL          : inferred trajectory
-    """
-
-    frames = []
-    global_frame = 0
+    - BALL          : inferred trajectory (supportFolder/ball_trajectory.py, zPos = height)
 
+    Built from arrays: ball trajectories for all events at once, owner / target repeated
+    per ball frame with np.repeat (rows per frame: OWNER, [TARGET], BALL).
+    Deterministic: same events + fps / interpolator / seed -> same frames.
+    """
     df_phase = (
         df_events[df_events["ID"].isin(event_ids)]
         .sort_values("eventSec")
@@ -404,60 +569,91 @@ def build_event_tracking(df_events: pd.DataFrame, event_ids, fps: int = 25):
     )
 
     if df_phase.empty:
-        return pd.DataFrame(frames)
-
-    for i, row in df_phase.iterrows():
-        next_row = df_phase.iloc[i + 1] if i + 1 < len(df_phase) else None
-
-        x0, y0 = row["posBeforeXMeters"], row["posBeforeYMeters"]
-        if not valid_pos(x0, y0):
-            continue
-
-        team_label = "Home" if row["teamID"] == row["homeTeamID"] else "Away"
-
-        ball_frames = event_to_ball_frames(row, fps=fps)
-        if not ball_frames:
-            continue
-
-        target_player = infer_target_player(row, next_row)
-
-        for b in ball_frames:
-
-            # ---- OWNER
-            frames.append({
-                "frame": global_frame,
-                "entityType": "PLAYER_OWNER",
-                "playerID": row["playerID"],
-                "playerName": row.get("playerName"),
-                "team": team_label,
-                "xPos": x0,
-                "yPos": y0,
-                "eventID": row["ID"],
-                "eventName": row["eventName"]
-            })
-
-            # ---- TARGET
-            if target_player:
-                frames.append({
-                    "frame": global_frame,
-                    "entityType": "PLAYER_TARGET",
-                    **target_player,
-                    "eventID": row["ID"]
-                })
-
-            # ---- BALL
-            frames.append({
-                "frame": global_frame,
-                "entityType": "BALL",
-                "team": "Ball",
-                "xPos": b["xPos"],
-                "yPos": b["yPos"],
-                "eventID": row["ID"]
-            })
-
-            global_frame += 1
-
-    return pd.DataFrame(frames)
+        return pd.DataFrame([])
+
+    has_target = infer_target_players(df_phase)
+
+    x0 = df_phase["posBeforeXMeters"].to_numpy()
+    y0 = df_phase["posBeforeYMeters"].to_numpy()
+    valid = pd.notna(x0) & pd.notna(y0) & ~((x0 == 0) & (y0 == 0))
+
+    df_valid = df_phase[valid]
+    if df_valid.empty:
+        return pd.DataFrame([])
+
+    xt, yt = infer_ball_targets(df_valid, seed)
+    _, event_idx, ball_x, ball_y, ball_z = ball_trajectories(df_valid, xt, yt, fps, interpolator)
+
+    # Vị trí hàng trong bảng kết quả: mỗi frame = OWNER, [TARGET], BALL
+    rows_idx = np.flatnonzero(valid)[event_idx]     # hàng df_phase của mỗi frame
+    frame_target = has_target[rows_idx]
+    rows_per_frame = 2 + frame_target
+    owner_at = np.cumsum(rows_per_frame) - rows_per_frame
+    target_at = owner_at[frame_target] + 1
+    ball_at = owner_at + 1 + frame_target
+    n_rows = int(rows_per_frame.sum())
+
+    target_idx = rows_idx[frame_target] + 1         # target = hàng tiếp theo của df_phase
+
+    def column(owner_values, target_values, ball_values, dtype=object):
+        out = np.empty(n_rows, dtype=dtype)
+        out[owner_at] = owner_values
+        out[target_at] = target_values
+        out[ball_at] = ball_values
+        return out
+
+    team_label = np.where(df_phase["teamID"].to_numpy() == df_phase["homeTeamID"].to_numpy(), "Home", "Away")
+    player_id = df_phase["playerID"].to_numpy()
+    player_name = df_phase["playerName"].to_numpy(dtype=object) if "playerName" in df_phase.columns else np.full(len(df_phase), None)
+    event_id = df_phase["ID"].to_numpy()
+    event_name = df_phase["eventName"].to_numpy(dtype=object)
+
+    frame = np.repeat(np.arange(len(rows_idx)), rows_per_frame)
+
+    return pd.DataFrame({
+        "frame": frame,
+        "entityType": column("PLAYER_OWNER", "PLAYER_TARGET", "BALL"),
+        "playerID": column(player_id[rows_idx], player_id[target_idx], np.nan, dtype=float),
+        "playerName": column(player_name[rows_idx], player_name[target_idx], np.nan),
+        "team": column(team_label[rows_idx], team_label[target_idx], "Ball"),
+        "xPos": column(x0[rows_idx], x0[target_idx], ball_x, dtype=float),
+        "yPos": column(y0[rows_idx], y0[target_idx], ball_y, dtype=float),
+        "zPos": column(np.nan, np.nan, ball_z, dtype=float),
+        "eventID": column(event_id[rows_idx], event_id[rows_idx[frame_target]], event_id[rows_idx], dtype=np.int64),
+        "eventName": column(event_name[rows_idx], np.nan, np.nan),
+    })
+
+
+TRACKING_ENTITIES = ["PLAYER_OWNER", "PLAYER_TARGET", "BALL"]
+
+
+def split_tracking_frames(tracking_df, entity_types=TRACKING_ENTITIES, extra_columns=()):
+    """
+    Group pseudo tracking rows by entity type and frame once (for the animators)
+
+    Return: frames (sorted frame ids),
+            {entityType: {"xy": (n, 2) array, "team": (n,) array, "bounds": (len(frames) + 1,) array,
+                          + 1 (n,) array per extra column}}
+    rows of frames[i] = xy[bounds[i]:bounds[i + 1]]
+    """
+    frames = np.unique(tracking_df["frame"].to_numpy())
+    entity = tracking_df["entityType"]
+    groups = {}
+
+    for entity_type in entity_types:
+        df = tracking_df[(entity == entity_type).to_numpy()]
+        order = np.argsort(df["frame"].to_numpy(), kind="stable")
+        frame_codes = np.searchsorted(frames, df["frame"].to_numpy()[order])
+
+        groups[entity_type] = {
+            "xy": df[["xPos", "yPos"]].to_numpy(dtype=float)[order],
+            "team": df["team"].to_numpy(dtype=object)[order],
+            "bounds": np.searchsorted(frame_codes, np.arange(len(frames) + 1)),
+        }
+        for col in extra_columns:
+            groups[entity_type][col] = df[col].to_numpy(dtype=object)[order]
+
+    return frames, groups
 
 
 def filter_time_windows(df, match_id, period, start_sec, end_sec):
@@ -471,93 +667,204 @@ def filter_time_windows(df, match_id, period, start_sec, end_sec):
         ].sort_values("eventSec").copy())
 
 
-def single_event_phases(df_events, eventName, preSec=10, postSec=2):
-    phases=[]
+#==========================
+# PHASE INDEX: sort 1 lần, cắt cửa sổ thời gian bằng searchsorted
 
-    targets = df_events[df_events["eventName"] == eventName]
+def sort_events_for_phases(df_events):
+    """
+    Stable sort by (matchID, matchPeriod, eventSec)
 
-    for _, ev in targets.iterrows():
-        start = max(0, ev["eventSec"] - preSec)
-        end = ev["eventSec"] + postSec
+    Return: df_sorted, rank (position of each df_events row in df_sorted), block_starts
+    (first position of every (matchID, matchPeriod) block in df_sorted)
+    """
+    match_ids = df_events["matchID"].to_numpy()
+    period_codes = pd.factorize(df_events["matchPeriod"], sort=True)[0]
+    order = np.lexsort((df_events["eventSec"].to_numpy(), period_codes, match_ids))
 
-        phase = filter_time_windows(df_events, ev["matchID"], ev["matchPeriod"], start, end)
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
 
-        if not phase.empty:
-            phases.append(phase)
-    return phases
+    match_sorted, period_sorted = match_ids[order], period_codes[order]
+    new_block = np.ones(len(order), dtype=bool)
+    new_block[1:] = (match_sorted[1:] != match_sorted[:-1]) | (period_sorted[1:] != period_sorted[:-1])
 
+    return df_events.iloc[order], rank, np.flatnonzero(new_block)
 
-def pair_event_phases(df_events, event_pair, preSec=6, postSec=2, timeGap = 4):
 
-    e1, e2 = event_pair
-    phases = []
+def phase_windows(df_sorted, block_starts, target_pos, start_sec, end_sec):
+    """
+    [lo, hi) positions in df_sorted of the events with start_sec <= eventSec <= end_sec,
+    inside the (matchID, matchPeriod) block of each target (1 searchsorted per block)
+    """
+    secs = df_sorted["eventSec"].to_numpy()
+    block_ends = np.append(block_starts[1:], len(secs))
 
-    df = df_events.sort_values(
-        ["matchID", "matchPeriod", "eventSec"]
-    ).reset_index(drop=True)
+    target_block = np.searchsorted(block_starts, target_pos, side="right") - 1
+    lo = np.empty(len(target_pos), dtype=np.int64)
+    hi = np.empty(len(target_pos), dtype=np.int64)
 
-    for i in range(len(df) - 1):
-        r1 = df.loc[i]
-        r2 = df.loc[i + 1]
+    for block in np.unique(target_block):
+        in_block = target_block == block
+        b_start, b_end = block_starts[block], block_ends[block]
+        block_secs = secs[b_start:b_end]
 
-        if(
-            r1["eventName"] == e1 and 
-            r2["eventName"] == e2 and
-            r1["teamID"] == r2["teamID"] and
-            r1["matchID"] == r2["matchID"] and
-            r1["matchPeriod"] == r2["matchPeriod"] and
-            (r2["eventSec"] - r1["eventSec"]) <= timeGap
-        ):
-            
-            start = max(0, r1["eventSec"] - preSec)
-            end = r2["eventSec"] + postSec
+        lo[in_block] = b_start + np.searchsorted(block_secs, start_sec[in_block], side="left")
+        hi[in_block] = b_start + np.searchsorted(block_secs, end_sec[in_block], side="right")
 
-            phase = filter_time_windows(df_events, r1["matchID"], r2["matchPeriod"], start, end)
+    return lo, hi
 
-            if not phase.empty:
-                phases.append(phase)
 
-    return phases
+def phases_to_frame(df_sorted, lo, hi):
+    """
+    Concatenate windows [lo, hi) into one frame labelled by phaseID (0..n-1, target order)
+    """
+    lengths = hi - lo
+    positions = np.repeat(lo - np.cumsum(np.append(0, lengths[:-1])), lengths) + np.arange(lengths.sum())
 
+    df_phases = df_sorted.iloc[positions].copy()
+    df_phases.insert(0, "phaseID", np.repeat(np.arange(len(lo)), lengths))
+    return df_phases
 
-def lead_to_goal_phases(df_events, preSec=15, postSec=2, allowed_events=None):
-    
-    phases = []
 
-    df = df_events.sort_values(
-        ["matchID", "matchPeriod", "eventSec"]
-    )
+def split_phases(df_phases):
+    """
+    phaseID frame -> list of DataFrames (1 iloc slice per phase)
+    """
+    phase_ids = df_phases["phaseID"].to_numpy()
+    bounds = np.flatnonzero(np.diff(phase_ids)) + 1
+    starts = np.append(0, bounds)
+    ends = np.append(bounds, len(phase_ids))
+
+    df = df_phases.drop(columns="phaseID")
+    return [df.iloc[start:end] for start, end in zip(starts, ends) if end > start]
+
 
-    goals = df[df["Goal"] == 1]
+def event_phases(df_events, target_mask, preSec, postSec, as_frame=False):
+    """
+    Windows [eventSec - preSec, eventSec + postSec] around every target event (in df_events order)
+    """
+    df_sorted, rank, block_starts = sort_events_for_phases(df_events)
+
+    target_pos = rank[np.flatnonzero(target_mask)]
+    target_sec = df_sorted["eventSec"].to_numpy()[target_pos]
 
+    lo, hi = phase_windows(df_sorted, block_starts, target_pos, np.maximum(0, target_sec - preSec), target_sec + postSec)
+    lo, hi = lo[hi > lo], hi[hi > lo]
 
-    for _, goal in goals.iterrows():
-        start = max(0, goal["eventSec"] - preSec)
-        end = goal["eventSec"] + postSec
+    if as_frame:
+        return phases_to_frame(df_sorted, lo, hi)
+    return [df_sorted.iloc[start:end] for start, end in zip(lo, hi)]
 
-        phase = filter_time_windows(df, goal["matchID"], goal["matchPeriod"], start, end)
 
-        phase = phase[phase["teamID"] == goal["teamID"]]
+def single_event_phases(df_events, eventName, preSec=10, postSec=2, as_frame=False):
+    """
+    1 phase per event eventName: events of the same match / period within [-preSec, +postSec]
+
+    Return: list of DataFrames (sorted by eventSec), or 1 frame with a phaseID column (as_frame=True)
+    """
+    target_mask = (df_events["eventName"] == eventName).to_numpy()
+    return event_phases(df_events, target_mask, preSec, postSec, as_frame)
+
+
+def sequence_event_phases(df_events, event_sequence, preSec=6, postSec=2, timeGap=4, as_frame=False):
+    """
+    Phases of consecutive events e1 -> e2 -> ... -> ek (any length >= 2) of the same team,
+    match and period, each step at most timeGap seconds after the previous one.
+
+    Found with shifted-column masks over the sorted events (1 vectorised pass);
+    window = [first eventSec - preSec, last eventSec + postSec].
+    """
+    event_sequence = list(event_sequence)
+    steps = len(event_sequence)
 
-        if allowed_events is not None:
-            phase = phase[phase["eventName"].isin(allowed_events)]
+    df_sorted, _, block_starts = sort_events_for_phases(df_events)
+    n = len(df_sorted)
 
-        if not phase.empty:
-            phases.append(phase)
+    name_codes, names = pd.factorize(df_sorted["eventName"])
+    lookup = {name: code for code, name in enumerate(names)}
 
-    return phases
+    block_id = np.zeros(n, dtype=np.int64)
+    block_id[block_starts[1:]] = 1
+    block_id = np.cumsum(block_id)
 
+    team = df_sorted["teamID"].to_numpy()
+    secs = df_sorted["eventSec"].to_numpy()
 
-def select_hightlight_events(df_events, event_types, preSec=10, postSec=2, timeGap=4, allowed_events=None):
+    # Vị trí i bắt đầu chuỗi: so sánh hàng i với hàng i + k (k = 0..steps-1)
+    last = max(n - steps + 1, 0)
+    match = name_codes[:last] == lookup.get(event_sequence[0], -2)
+
+    for k in range(1, steps):
+        match &= name_codes[k:last + k] == lookup.get(event_sequence[k], -2)
+        match &= block_id[k:last + k] == block_id[:last]
+        match &= team[k:last + k] == team[:last]
+        match &= (secs[k:last + k] - secs[k - 1:last + k - 1]) <= timeGap
+
+    start_pos = np.flatnonzero(match)
+    end_pos = start_pos + steps - 1
+
+    lo, hi = phase_windows(df_sorted, block_starts, start_pos,
+                           np.maximum(0, secs[start_pos] - preSec), secs[end_pos] + postSec)
+
+    if as_frame:
+        return phases_to_frame(df_sorted, lo, hi)
+    return [df_sorted.iloc[a:b] for a, b in zip(lo, hi)]
+
+
+def pair_event_phases(df_events, event_pair, preSec=6, postSec=2, timeGap = 4, as_frame=False):
+    """
+    e1 -> e2 of the same team within timeGap seconds (sequence_event_phases with 2 steps)
+    """
+    return sequence_event_phases(df_events, event_pair, preSec, postSec, timeGap, as_frame)
+
+
+def lead_to_goal_phases(df_events, preSec=15, postSec=2, allowed_events=None, as_frame=False):
+    """
+    1 phase per goal: events of the scoring team in [-preSec, +postSec] (optionally only allowed_events)
+    """
+    df_sorted, rank, block_starts = sort_events_for_phases(df_events)
+
+    # Thứ tự bàn thắng theo (matchID, matchPeriod, eventSec)
+    goal_pos = np.sort(rank[np.flatnonzero(df_events["Goal"].to_numpy() == 1)])
+    goal_sec = df_sorted["eventSec"].to_numpy()[goal_pos]
+
+    lo, hi = phase_windows(df_sorted, block_starts, goal_pos, np.maximum(0, goal_sec - preSec), goal_sec + postSec)
+    df_phases = phases_to_frame(df_sorted, lo, hi)
+
+    goal_team = df_sorted["teamID"].to_numpy()[goal_pos]
+    keep = df_phases["teamID"].to_numpy() == goal_team[df_phases["phaseID"].to_numpy()]
+    if allowed_events is not None:
+        keep &= df_phases["eventName"].isin(allowed_events).to_numpy()
+
+    df_phases = df_phases[keep]
+    # Đánh số lại phaseID sau khi bỏ các phase rỗng
+    df_phases = df_phases.assign(phaseID=pd.factorize(df_phases["phaseID"])[0])
+
+    return df_phases if as_frame else split_phases(df_phases)
+
+
+def select_hightlight_events(df_events, event_types, preSec=10, postSec=2, timeGap=4, allowed_events=None, as_frame=False):
+    """
+    event_types: "LEAD_TO_GOAL" | 1 eventName | tuple of eventNames | pattern "A -> B[col=v]@zone ..."
+    allowed_events: eventNames kept in the phases
+        - LEAD_TO_GOAL: filter of the phase rows (goals are found on all events)
+        - other modes: pre-filter -> patterns / sequences are matched on the allowed events only
+    """
+    if allowed_events is not None and event_types != "LEAD_TO_GOAL":
+        df_events = df_events[df_events["eventName"].isin(allowed_events)]
 
     if isinstance(event_types, str):
+        if "->" in event_types:
+            # Pattern "A -> B[col=v]@zone ..." (xem supportFolder/event_patterns.py)
+            from supportFolder.event_patterns import pattern_phases
+            return pattern_phases(df_events, event_types, preSec, postSec, max_gap=timeGap, as_frame=as_frame)
         if event_types == "LEAD_TO_GOAL":
-            return lead_to_goal_phases(df_events, preSec, postSec, allowed_events)
+            return lead_to_goal_phases(df_events, preSec, postSec, allowed_events, as_frame)
         else:
-            return single_event_phases(df_events, event_types, preSec, postSec)
+            return single_event_phases(df_events, event_types, preSec, postSec, as_frame)
     
-    if isinstance(event_types, tuple) and len(event_types) == 2:
-        return pair_event_phases(df_events, event_types, preSec, postSec, timeGap)
+    if isinstance(event_types, tuple) and len(event_types) >= 2:
+        return sequence_event_phases(df_events, event_types, preSec, postSec, timeGap, as_frame)
     
     raise ValueError(f"{event_types} Không hợp lệ")
 
@@ -1,10 +1,23 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation, FFMpegWriter
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_rgba, to_rgba_array
 from matplotlib.patches import Rectangle, Circle, Arc
+import numpy as np
 import pandas as pd
 
 from pathlib import Path
 
+from supportFolder.statical_eventTracking import build_event_tracking, split_tracking_frames, split_phases
+
 ROOT = Path(__file__).resolve().parents[1]
 DEFAULT_VIDEO_DIR = ROOT / "dataset" / "video_"
 DEFAULT_VIDEO_DIR.mkdir(parents=True, exist_ok=True)
@@ -19,6 +32,25 @@ TEAM_COLOURS = {
     "Ball": "#000000"
 }
 
+# Style của 3 collection cố định (owner / target / ball)
+ENTITY_STYLES = {
+    "PLAYER_OWNER": dict(s=160, edgecolors="white", linewidths=2, zorder=3),
+    "PLAYER_TARGET": dict(s=110, alpha=0.6, edgecolors="white", linewidths=1.5, zorder=2),
+    "BALL": dict(s=40, edgecolors="white", linewidths=1, zorder=4),
+}
+
+
+def team_rgba(teams, entity_type):
+    """
+    RGBA face colour per row (TEAM_COLOURS, gray for unknown teams, black ball)
+    """
+    if entity_type == "BALL":
+        return np.tile(to_rgba(TEAM_COLOURS["Ball"]), (len(teams), 1))
+
+    labels, codes = np.unique(np.asarray(teams, dtype=str), return_inverse=True)
+    palette = to_rgba_array([TEAM_COLOURS.get(label, "gray") for label in labels]) if len(labels) else np.empty((0, 4))
+    return palette[codes.reshape(-1)]
+
 
 # ===============================
 # PITCH DRAWING (PURE MPL)
@@ -122,6 +154,30 @@ def draw_pitch_mpl(ax, length=105, width=68, theme="white"):
     ax.set_aspect("equal")
     ax.axis("off")
 
+
+# ===============================
+# OUTPUT NAMING
+# ===============================
+def phase_team_label(tracking_df: pd.DataFrame) -> str:
+    """
+    Team that owns the ball most often in the phase ("Unknown" without owner rows)
+    """
+    owners = tracking_df[tracking_df["entityType"] == "PLAYER_OWNER"]
+    return owners["team"].value_counts().idxmax() if not owners.empty else "Unknown"
+
+
+def phase_video_path(video_dir, matchID, phase_idx, team_label) -> Path:
+    return Path(video_dir) / f"match_{matchID}_phase_{phase_idx}_{team_label}.mp4"
+
+
+def phase_key(df_phase: pd.DataFrame) -> str:
+    """
+    Stable phase name "firstEventID-lastEventID": same events -> same file,
+    whatever the highlight selection / order the phase was exported with
+    """
+    return f"{int(df_phase['ID'].iloc[0])}-{int(df_phase['ID'].iloc[-1])}"
+
+
 # ===============================
 # MAIN CLASS
 # ===============================
@@ -154,75 +210,66 @@ class MPLFootballAnimator:
         if missing:
             raise ValueError(f"Missing columns: {missing}")
 
-        self.df.sort_values("frame", inplace=True)
-        self.frames = sorted(self.df["frame"].unique())
+        # Gom nhóm theo frame 1 lần: frame i của entity = xy[bounds[i]:bounds[i + 1]]
+        self.frames, self.groups = split_tracking_frames(self.df)
+        for entity_type, group in self.groups.items():
+            group["rgba"] = team_rgba(group["team"], entity_type)
 
         self.fig, self.ax = plt.subplots(figsize=(10, 6))
-        self.fig.patch.set_facecolor("#0CE834") 
+        self.fig.patch.set_facecolor("#0CE834")
+
+        # Sân vẽ 1 lần (background), chỉ 3 collection + tiêu đề thay đổi theo frame
+        draw_pitch_mpl(self.ax, self.pitch_length, self.pitch_width)
+        self.collections = {
+            entity_type: self.ax.scatter([], [], animated=True, **style)
+            for entity_type, style in ENTITY_STYLES.items()
+        }
+        self.title = self.ax.set_title("", fontsize=12, animated=True)
 
     # ===============================
     # FRAME UPDATE
     # ===============================
-    def _update(self, frame_id):
-        self.ax.clear()
-        draw_pitch_mpl(self.ax, self.pitch_length, self.pitch_width)
+    def _artists(self):
+        return [*self.collections.values(), self.title]
 
-        fdf = self.df[self.df["frame"] == frame_id]
-
-        # PLAYER OWNER
-        owners = fdf[fdf["entityType"] == "PLAYER_OWNER"]
-        for _, row in owners.iterrows():
-            self.ax.scatter(
-                row["xPos"],
-                row["yPos"],
-                s=160,
-                c=TEAM_COLOURS.get(row["team"], "gray"),
-                edgecolors="white",
-                linewidths=2,
-                zorder=3
-            )
+    def _init(self):
+        for collection in self.collections.values():
+            collection.set_offsets(np.empty((0, 2)))
+        self.title.set_text("")
+        return self._artists()
 
-        # PLAYER TARGET
-        targets = fdf[fdf["entityType"] == "PLAYER_TARGET"]
-        for _, row in targets.iterrows():
-            self.ax.scatter(
-                row["xPos"],
-                row["yPos"],
-                s=110,
-                c=TEAM_COLOURS.get(row["team"], "gray"),
-                alpha=0.6,
-                edgecolors="white",
-                linewidths=1.5,
-                zorder=2
-            )
+    def _update(self, frame_idx):
+        for entity_type, collection in self.collections.items():
+            group = self.groups[entity_type]
+            start, end = group["bounds"][frame_idx], group["bounds"][frame_idx + 1]
 
-        # BALL
-        balls = fdf[fdf["entityType"] == "BALL"]
-        for _, row in balls.iterrows():
-            self.ax.scatter(
-                row["xPos"],
-                row["yPos"],
-                s=40,
-                c=TEAM_COLOURS["Ball"],
-                edgecolors="white",
-                linewidths=1,
-                zorder=4
-            )
+            collection.set_offsets(group["xy"][start:end])
+            collection.set_facecolor(group["rgba"][start:end])
 
-        self.ax.set_title(f"Frame: {frame_id}", fontsize=12)
+        self.title.set_text(f"Frame: {self.frames[frame_idx]}")
+        return self._artists()
 
     # ===============================
     # SAVE MP4
     # ===============================
-    def save_mp4(self, out_path: str| Path | None = None):
-
-        owners = self.df[self.df["entityType"] == "PLAYER_OWNER"]
-
-        team_labels = (
-            owners["team"].value_counts().idxmax()
-            if not owners.empty else "Unknown"
-        )
-
+    def save_mp4(
+            self,
+            out_path: str| Path | None = None,
+            mode: str = "pipe",
+            codec: str = "libx264",
+            preset: str = "medium",
+            crf: int = 23
+    ):
+        """
+        mode: "pipe"   -> pitch rasterised once, each frame restores it and draws only the moving
+                          artists into a reusable Agg RGB buffer, raw bytes streamed to ffmpeg stdin
+              "writer" -> FuncAnimation + FFMpegWriter: the writer savefigs the whole figure
+                          (pitch included) for every frame
+        codec / preset / crf: encoder settings of the pipe mode
+              (e.g. preset="ultrafast" encodes faster for bigger / lower quality files)
+        """
+        if mode not in ("writer", "pipe"):
+            raise ValueError("mode phải là 'writer' hoặc 'pipe'")
 
         if out_path is None:
             if self.matchID is None or self.phase_idx is None:
@@ -230,20 +277,248 @@ class MPLFootballAnimator:
                     "Hoặc cung cấp out_path HOẶC thiết lập match_id & phase_idx để tự động tạo tên tệp."
                 )
 
-            out_path = (self.video_dir /
-                f"match_{self.matchID}_phase_{self.phase_idx}_{team_labels}.mp4")
-            
+            out_path = phase_video_path(self.video_dir, self.matchID, self.phase_idx, phase_team_label(self.df))
+
+        out_path = Path(out_path)
+
+        # Ghi file tạm (ẩn, cùng đuôi .mp4) rồi đổi tên -> không bao giờ có video ghi dở
+        tmp_path = out_path.with_name(f".{out_path.name}")
+        try:
+            if mode == "pipe":
+                self._save_pipe(tmp_path, codec, preset, crf)
+            else:
+                self._save_writer(tmp_path)
+            os.replace(tmp_path, out_path)
+        finally:
+            plt.close(self.fig)
+            tmp_path.unlink(missing_ok=True)
 
+        print(f"✅ Saved MP4: {out_path}")
+        return out_path
+
+    def _save_writer(self, out_path: Path):
         writer = FFMpegWriter(fps=self.fps)
 
+        # Animation.save luôn savefig cả figure mỗi frame (blit không có tác dụng khi save)
         ani = FuncAnimation(
             self.fig,
             self._update,
-            frames=self.frames,
+            frames=len(self.frames),
+            init_func=self._init,
             interval=1000 / self.fps
         )
 
         ani.save(str(out_path), writer=writer)
-        plt.close(self.fig)
 
-        print(f"✅ Saved MP4: {out_path}")
+    # ===============================
+    # RAW PIPE EXPORT
+    # ===============================
+    def iter_rgb_frames(self):
+        """
+        Yield every frame as the same (even height, even width, 3) uint8 buffer, rewritten in place.
+
+        The pitch is rasterised once (Agg background); each frame restores it and draws
+        only the 3 collections + title. Odd dimensions are padded with the figure colour
+        (yuv420p needs even sizes).
+        """
+        canvas = FigureCanvasAgg(self.fig)
+        self._init()
+        canvas.draw()                                   # animated artists bị bỏ qua -> chỉ có sân
+        background = canvas.copy_from_bbox(self.fig.bbox)
+
+        rgba = np.asarray(canvas.buffer_rgba())
+        height, width = rgba.shape[:2]
+
+        rgb = np.empty((height + height % 2, width + width % 2, 3), dtype=np.uint8)
+        rgb[:] = np.round(np.array(to_rgba(self.fig.get_facecolor())[:3]) * 255).astype(np.uint8)
+
+        for frame_idx in range(len(self.frames)):
+            canvas.restore_region(background)
+            for artist in self._update(frame_idx):
+                self.ax.draw_artist(artist)
+
+            rgb[:height, :width] = np.asarray(canvas.buffer_rgba())[..., :3]
+            yield rgb
+
+    def _save_pipe(self, out_path: Path, codec: str, preset: str, crf: int):
+        frames = self.iter_rgb_frames()
+        first = next(frames, None)
+        if first is None:
+            raise ValueError("Tracking không có frame nào")
+
+        height, width = first.shape[:2]
+        cmd = [
+            plt.rcParams["animation.ffmpeg_path"], "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(self.fps),
+            "-i", "-",
+            "-an", "-c:v", codec, "-preset", preset, "-crf", str(crf), "-pix_fmt", "yuv420p",
+            str(out_path),
+        ]
+
+        # stderr -> file tạm: pipe stderr đầy (ffmpeg log nhiều) sẽ chặn ffmpeg và cả vòng ghi frame
+        with tempfile.TemporaryFile() as stderr_file:
+            proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=stderr_file)
+            try:
+                proc.stdin.write(first.data)
+                for rgb in frames:
+                    proc.stdin.write(rgb.data)
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass                                    # ffmpeg đã dừng -> báo lỗi bên dưới
+            except BaseException:
+                proc.kill()
+                proc.wait()
+                raise
+
+            returncode = proc.wait()
+            stderr_file.seek(0)
+            stderr = stderr_file.read().decode(errors="replace")
+
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg lỗi ({returncode}): {stderr.strip()}")
+
+
+# ===============================
+# BATCH EXPORT
+# ===============================
+RENDER_VERSION = 2          # tăng khi output của renderer thay đổi -> render lại toàn bộ
+HASH_COLUMNS = ["frame", "entityType", "team", "xPos", "yPos"]
+REPORT_COLUMNS = ["matchID", "phaseKey", "path", "nbFrames", "status", "trackingSec", "renderSec", "error"]
+
+
+def phase_content_hash(tracking_df: pd.DataFrame, fps: int, pitch_length=105, pitch_width=68, save_options=None) -> str:
+    """
+    sha256 of what the video shows: drawn tracking columns + render settings
+    (save_options: save_mp4 mode / codec / preset / crf)
+    """
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(tracking_df[HASH_COLUMNS], index=False).to_numpy().tobytes())
+    digest.update(json.dumps({
+        "fps": fps,
+        "pitch": [pitch_length, pitch_width],
+        "version": RENDER_VERSION,
+        "save": save_options or {},
+    }, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def hash_sidecar_path(video_path: Path) -> Path:
+    return video_path.with_name(f"{video_path.name}.sha256")
+
+
+def is_up_to_date(video_path: Path, content_hash: str) -> bool:
+    sidecar = hash_sidecar_path(video_path)
+    return video_path.exists() and sidecar.exists() and sidecar.read_text().strip() == content_hash
+
+
+def remove_stale_videos(video_path: Path):
+    """
+    Delete the videos (+ .sha256) of the same match / phase with another team label
+    """
+    prefix = video_path.name.rsplit("_", 1)[0]
+    for path in video_path.parent.glob(f"{prefix}_*.mp4"):
+        if path != video_path:
+            path.unlink(missing_ok=True)
+            hash_sidecar_path(path).unlink(missing_ok=True)
+
+
+def _render_phase_job(tracking_df, out_path, content_hash, fps, pitch_length, pitch_width, save_options):
+    """
+    Worker: render 1 phase (atomic save_mp4), then write its hash sidecar. Return seconds.
+    """
+    plt.switch_backend("Agg")
+    start = time.perf_counter()
+
+    animator = MPLFootballAnimator(tracking_df, fps=fps, pitch_length=pitch_length, pitch_width=pitch_width)
+    animator.save_mp4(out_path, **save_options)
+
+    sidecar = hash_sidecar_path(out_path)
+    tmp_sidecar = sidecar.with_name(f".{sidecar.name}")
+    tmp_sidecar.write_text(content_hash)
+    os.replace(tmp_sidecar, sidecar)
+
+    return time.perf_counter() - start
+
+
+def export_phase_videos(
+        phases,
+        video_dir: Path = DEFAULT_VIDEO_DIR,
+        fps: int = 10,
+        tracking_fps: int = 25,
+        min_frames: int = 0,
+        max_workers: int = None,
+        force: bool = False,
+        pitch_length: int = 105,
+        pitch_width: int = 68,
+        save_options: dict = None
+) -> pd.DataFrame:
+    """
+    Render many highlight phases (select_hightlight_events output, any number of matches)
+    to match_{matchID}_phase_{phaseKey}_{team}.mp4 in a process pool.
+
+    phases: list of phase DataFrames or 1 frame with phaseID (as_frame=True)
+    phaseKey: "firstEventID-lastEventID" of the phase (phase_key), stable between selections;
+    a video of the same phase with another team label is removed
+    Phases whose video exists with the same content hash (.sha256 sidecar) are skipped
+    unless force. save_options: forwarded to save_mp4, e.g. {"preset": "veryfast"} or {"mode": "writer"}.
+    Return: 1 row per phase with status and timings (seconds).
+    """
+    save_options = dict(save_options or {})
+    if isinstance(phases, pd.DataFrame):
+        phases = split_phases(phases) if not phases.empty else []
+
+    video_dir = Path(video_dir)
+    video_dir.mkdir(parents=True, exist_ok=True)
+
+    report = []
+    jobs = {}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for df_phase in phases:
+            if df_phase.empty:
+                continue
+
+            matchID = int(df_phase["matchID"].iloc[0])
+            row = {"matchID": matchID, "phaseKey": phase_key(df_phase), "path": None,
+                   "nbFrames": 0, "status": "empty", "trackingSec": 0.0, "renderSec": 0.0, "error": None}
+            report.append(row)
+
+            start = time.perf_counter()
+            tracking_df = build_event_tracking(df_phase, df_phase["ID"], fps=tracking_fps)
+            row["trackingSec"] = time.perf_counter() - start
+
+            if tracking_df.empty:
+                continue
+
+            row["nbFrames"] = int(tracking_df["frame"].nunique())
+            if row["nbFrames"] < min_frames:
+                row["status"] = "too_short"
+                continue
+
+            out_path = phase_video_path(video_dir, matchID, row["phaseKey"], phase_team_label(tracking_df))
+            content_hash = phase_content_hash(tracking_df, fps, pitch_length, pitch_width, save_options)
+            row["path"] = str(out_path)
+            remove_stale_videos(out_path)
+
+            if not force and is_up_to_date(out_path, content_hash):
+                row["status"] = "skipped"
+                continue
+
+            future = executor.submit(_render_phase_job, tracking_df, out_path, content_hash, fps, pitch_length, pitch_width, save_options)
+            jobs[future] = row
+
+        for future in as_completed(jobs):
+            row = jobs[future]
+            try:
+                row["renderSec"] = future.result()
+                row["status"] = "rendered"
+            except Exception as exc:
+                row["status"] = "failed"
+                row["error"] = f"{type(exc).__name__}: {exc}"
+
+    df_report = pd.DataFrame(report, columns=REPORT_COLUMNS)
+    if not df_report.empty:
+        counts = df_report["status"].value_counts().to_dict()
+        print(f"Export phases: {counts} - render {df_report['renderSec'].sum():.1f}s (CPU), {video_dir}")
+
+    return df_report